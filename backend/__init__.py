@@ -2,6 +2,10 @@ import os
 from flask import Flask
 
 from backend.db import init_db
+from backend.assets import init_assets
+from backend.compressao import init_compressao
+from backend import jobs
+from backend.migrations import aplicar as aplicar_migracoes
 from backend.routes.auth import auth_bp
 from backend.routes.home_router import home_router_bp
 from backend.routes.home import home_cliente_bp
@@ -10,6 +14,9 @@ from backend.routes.home_admin import home_admin_bp
 from backend.routes.users_admin import users_admin_bp
 from backend.routes.minhas_solicitacoes import minhas_solicitacoes_bp
 from backend.routes.solicitacoes_consultor import solicitacoes_consultor_bp
+from backend.routes.eventos import eventos_bp
+from backend.routes.jobs import jobs_bp
+from backend.routes.assets import assets_bp
 
 
 # ✅ novo arquivo de rotas
@@ -21,7 +28,73 @@ def create_app():
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-secret-change-me")
     app.config["DATABASE"] = os.getenv("DATABASE_PATH", "database/Users.db")
 
+    # conexão SQLite (backend/db.connect): aplicado em TODA conexão aberta pelas rotas
+    app.config["SQLITE_PRAGMAS"] = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        "cache_size": -int(os.getenv("SQLITE_CACHE_KB", "16384")),  # negativo = KiB
+        "mmap_size": int(os.getenv("SQLITE_MMAP_MB", "128")) * 1024 * 1024,
+        "temp_store": "MEMORY",
+    }
+    app.config["SQLITE_CACHED_STATEMENTS"] = int(os.getenv("SQLITE_CACHED_STATEMENTS", "256"))
+
+    # pools por processo: leitura (mode=ro, GETs) separado da escrita (poucas conexões)
+    app.config["SQLITE_POOL_LEITURA"] = int(os.getenv("SQLITE_POOL_LEITURA", "16"))
+    app.config["SQLITE_POOL_ESCRITA"] = int(os.getenv("SQLITE_POOL_ESCRITA", "4"))
+    # conexões do pool quase nunca fecham: PRAGMA optimize a cada N empréstimos (0 desliga)
+    app.config["SQLITE_OPTIMIZE_A_CADA"] = int(os.getenv("SQLITE_OPTIMIZE_A_CADA", "500"))
+
+    # store de anexos por conteúdo (SHA-256) — ver database/migration_blobs_to_store.py
+    app.config["ANEXOS_DIR"] = os.getenv("ANEXOS_DIR", "database/Anexos")
+
+    # uploads: teto da requisição inteira (413) + limite por tipo de anexo, em MB
+    app.config["MAX_CONTENT_LENGTH"] = int(os.getenv("MAX_UPLOAD_MB", "25")) * 1024 * 1024
+    app.config["UPLOAD_LIMITES_MB"] = {
+        "solicitacoes_admissional": int(os.getenv("UPLOAD_MB_ADMISSIONAL", "10")),
+        "solicitacoes_retorno_trabalho": int(os.getenv("UPLOAD_MB_RETORNO", "10")),
+        "solicitacoes_avaliacao_medica": int(os.getenv("UPLOAD_MB_AVALIACAO", "10")),
+        # PDF final que o consultor anexa ao finalizar (api_salvar_avaliacao_consultor)
+        "consultor_pdf_final": int(os.getenv("UPLOAD_MB_PDF_FINAL", "10")),
+    }
+
+    # fila do consultor paginada (0 = lista tudo, como antes; ?limite=N também ativa)
+    app.config["CONSULTOR_PAGE_SIZE"] = int(os.getenv("CONSULTOR_PAGE_SIZE", "0"))
+
+    # cache do HTML de "Minhas solicitações" e da fila do consultor (backend/cache_paginas.py)
+    app.config["PAGE_CACHE"] = os.getenv("PAGE_CACHE", "1") == "1"
+    app.config["PAGE_CACHE_MAX"] = int(os.getenv("PAGE_CACHE_MAX", "256"))
+    app.config["PAGE_CACHE_TTL_S"] = int(os.getenv("PAGE_CACHE_TTL_S", "300"))
+    # página em stream maior que isso não é guardada (memória do worker não cresce com a lista)
+    app.config["PAGE_CACHE_ITEM_KB"] = int(os.getenv("PAGE_CACHE_ITEM_KB", "4096"))
+    # pedaços do template juntados por vez no stream das listagens (1 = sem buffer)
+    app.config["PAGE_STREAM_BUFFER"] = int(os.getenv("PAGE_STREAM_BUFFER", "200"))
+
+    # schema: aplica as migrações pendentes ao subir (o mesmo que database/migrate.py)
+    app.config["AUTO_MIGRATE"] = os.getenv("AUTO_MIGRATE", "1") == "1"
+
+    # fila de tarefas em segundo plano (backend/jobs.py): threads por processo, 0 = desliga
+    app.config["JOBS_WORKERS"] = int(os.getenv("JOBS_WORKERS", "2"))
+    app.config["JOBS_POLL_S"] = float(os.getenv("JOBS_POLL_S", "2"))
+    app.config["JOBS_BACKOFF_S"] = int(os.getenv("JOBS_BACKOFF_S", "5"))
+    app.config["JOBS_LEASE_S"] = int(os.getenv("JOBS_LEASE_S", "600"))
+
+    # estáticos com hash no nome (python build_assets.py); sem build, templates usam /static
+    app.config["ASSETS_DIST"] = os.getenv("ASSETS_DIST", "static/dist")
+
+    # compressão gzip/br das respostas de texto (HTML, JSON) — backend/compressao.py
+    app.config["COMPRESS"] = os.getenv("COMPRESS", "1") == "1"
+    app.config["COMPRESS_LEVEL"] = int(os.getenv("COMPRESS_LEVEL", "6"))
+    app.config["COMPRESS_MIN_BYTES"] = int(os.getenv("COMPRESS_MIN_BYTES", "500"))
+    # stream: flush do compressor a cada N KB de texto (flush por pedaço estraga a compressão)
+    app.config["COMPRESS_FLUSH_KB"] = int(os.getenv("COMPRESS_FLUSH_KB", "16"))
+
     init_db(app)
+    init_assets(app)
+    init_compressao(app)
+
+    if app.config["AUTO_MIGRATE"]:
+        aplicar_migracoes(os.path.abspath(app.config["DATABASE"]))
 
     # Blueprints
     app.register_blueprint(auth_bp)
@@ -33,9 +106,15 @@ def create_app():
     app.register_blueprint(sol_agendamento_bp)
     app.register_blueprint(minhas_solicitacoes_bp)
     app.register_blueprint(solicitacoes_consultor_bp)
+    app.register_blueprint(eventos_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(assets_bp)
 
 
     # ✅ novo
     app.register_blueprint(users_admin_bp)
 
+    # workers da fila (depois das migrações e dos blueprints, que registram os handlers)
+    jobs.iniciar(app)
+
     return app
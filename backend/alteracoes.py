@@ -0,0 +1,159 @@
+# backend/alteracoes.py
+"""
+Log de alterações das solicitações (para a fila do consultor atualizar só o que mudou).
+
+Triggers nas seis tabelas solicitacoes_* gravam uma linha em "solicitacoes_alteracoes" a cada
+INSERT / UPDATE / DELETE: (seq, tabela, rid, protocolo, usuario, op, em).
+- seq é AUTOINCREMENT: só cresce, nunca é reaproveitado -> serve de cursor;
+- o próprio log se poda (trigger): ficam as últimas RETENCAO alterações. Cursor mais velho que
+  isso não tem como ser atendido -> o cliente recarrega a página inteira.
+
+Criação: migração backend/migrations/0009_alteracoes.py (usa criar_log daqui).
+"""
+import base64
+import json
+
+from backend.db import evento_update
+
+TABELA = "solicitacoes_alteracoes"
+RETENCAO = 20000
+
+TABELAS = [
+    "solicitacoes_admissional",
+    "solicitacoes_avaliacao_medica",
+    "solicitacoes_demissional",
+    "solicitacoes_mudanca_riscos",
+    "solicitacoes_periodico",
+    "solicitacoes_retorno_trabalho",
+]
+
+
+def _colunas(conn, tabela):
+    return [r[1] for r in conn.execute(f'PRAGMA table_info("{tabela}")').fetchall()]
+
+
+def _expr(cols, prefixo, coluna):
+    return f'{prefixo}."{coluna}"' if coluna in cols else "NULL"
+
+
+def criar_log(conn):
+    """Cria (se faltar) a tabela de log e (re)cria os triggers. Idempotente."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABELA} (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tabela TEXT NOT NULL,
+            rid INTEGER NOT NULL,
+            protocolo TEXT,
+            usuario TEXT,
+            op TEXT NOT NULL,
+            em INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+        )
+    """)
+
+    conn.execute(f'DROP TRIGGER IF EXISTS "trg_{TABELA}_poda"')
+    conn.execute(f"""
+        CREATE TRIGGER "trg_{TABELA}_poda" AFTER INSERT ON {TABELA}
+        WHEN NEW.seq % 1000 = 0
+        BEGIN
+            DELETE FROM {TABELA} WHERE seq <= NEW.seq - {RETENCAO};
+        END
+    """)
+
+    for tabela in TABELAS:
+        cols = _colunas(conn, tabela)
+        if not cols:
+            continue
+
+        for sufixo in ("ai", "au", "ad"):
+            conn.execute(f'DROP TRIGGER IF EXISTS "trg_{tabela}_log_{sufixo}"')
+
+        def insert(prefixo, op):
+            return (
+                f"INSERT INTO {TABELA} (tabela, rid, protocolo, usuario, op) VALUES ("
+                f"'{tabela}', {prefixo}.rowid, {_expr(cols, prefixo, 'protocolo')}, "
+                f"{_expr(cols, prefixo, 'user')}, '{op}');"
+            )
+
+        conn.execute(f"""
+            CREATE TRIGGER "trg_{tabela}_log_ai" AFTER INSERT ON "{tabela}" BEGIN
+                {insert("NEW", "I")}
+            END
+        """)
+        # o preenchimento de created_at/updated_at pelos triggers da 0008 (logo depois do INSERT e
+        # da mudança de status) não conta: seria uma segunda linha para a mesma alteração
+        conn.execute(f"""
+            CREATE TRIGGER "trg_{tabela}_log_au" AFTER {evento_update(conn, tabela)} ON "{tabela}" BEGIN
+                {insert("NEW", "U")}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER "trg_{tabela}_log_ad" AFTER DELETE ON "{tabela}" BEGIN
+                {insert("OLD", "D")}
+            END
+        """)
+
+
+# =========================
+# Cursor
+# =========================
+def encode_cursor(seq):
+    raw = json.dumps({"s": int(seq)}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """Cursor opaco -> seq. Inválido = None."""
+    if not token:
+        return None
+    try:
+        pad = "=" * (-len(token) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(token + pad))["s"])
+    except Exception:
+        return None
+
+
+def ultimo_seq(db):
+    row = db.execute(f"SELECT MAX(seq) FROM {TABELA}").fetchone()
+    return row[0] or 0
+
+
+def desde(db, seq, limite=500, usuario=None):
+    """
+    Alterações depois de `seq`, uma por solicitação (vale a mais recente).
+    Retorna (alteracoes, novo_seq, completo):
+    - alteracoes = [{"tabela", "rid", "protocolo", "usuario", "op", "seq"}, ...] em ordem de seq;
+    - completo = False se `seq` já foi podado do log (ou é de outro banco): recarregar tudo.
+    Com mais de `limite` alterações, devolve as primeiras e novo_seq para continuar dali.
+    usuario: só as linhas desse login (cliente).
+    """
+    minimo, maximo = db.execute(f"SELECT MIN(seq), MAX(seq) FROM {TABELA}").fetchone()
+    maximo = maximo or 0
+    if seq > maximo or (minimo is not None and seq < minimo - 1):
+        return [], maximo, False
+
+    where = "seq > ?"
+    params = [seq]
+    if usuario is not None:
+        where += " AND usuario = ?"
+        params.append(usuario)
+
+    rows = db.execute(
+        f"SELECT seq, tabela, rid, protocolo, usuario, op FROM {TABELA} "
+        f"WHERE {where} ORDER BY seq LIMIT ?",
+        params + [limite],
+    ).fetchall()
+
+    ultimas = {}
+    for r in rows:
+        ultimas[(r["tabela"], r["rid"])] = {
+            "tabela": r["tabela"],
+            "rid": r["rid"],
+            "protocolo": r["protocolo"],
+            "usuario": r["usuario"],
+            "op": r["op"],
+            "seq": r["seq"],
+        }
+
+    alteracoes = sorted(ultimas.values(), key=lambda a: a["seq"])
+    novo_seq = rows[-1]["seq"] if len(rows) == limite else maximo
+    return alteracoes, novo_seq, True
@@ -0,0 +1,209 @@
+# backend/anexos.py
+"""
+Armazenamento de anexos endereçado por conteúdo (SHA-256).
+
+Cada arquivo distinto fica UMA vez em <ANEXOS_DIR>/<ab>/<cd>/<sha256>.
+As tabelas guardam só a referência (arquivo_sha256) e o tamanho (arquivo_tamanho);
+a coluna BLOB "arquivo" fica NULL. A cópia em Documentos_*/<protocolo>/ é um hardlink
+para o mesmo objeto (quando o sistema de arquivos permite), então não ocupa espaço extra.
+
+Uploads: o stream vai para um temporário em blocos (nunca o arquivo inteiro na memória),
+o primeiro bloco é validado (ex.: assinatura %PDF-) e o limite de tamanho é checado
+durante a cópia. Só no final o arquivo entra no lugar, com rename atômico.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+from flask import current_app
+
+CHUNK_SIZE = 64 * 1024
+
+
+class AnexoInvalido(ValueError):
+    """Upload recusado (tipo ou tamanho); a mensagem já vem pronta para o usuário."""
+
+
+class AnexoGrande(AnexoInvalido):
+    """Upload recusado por passar do limite de tamanho."""
+
+
+def validar_pdf(primeiro_bloco: bytes):
+    # a assinatura pode vir depois de lixo/BOM, mas sempre no primeiro 1 KiB
+    if b"%PDF-" not in primeiro_bloco[:1024]:
+        raise AnexoInvalido("❌ O anexo precisa ser um PDF válido.")
+
+
+def anexos_dir():
+    return os.path.abspath(current_app.config.get("ANEXOS_DIR", "database/Anexos"))
+
+
+def _valid_sha(sha: str) -> bool:
+    return bool(sha) and len(sha) == 64 and all(ch in "0123456789abcdef" for ch in sha)
+
+
+def caminho_objeto(sha: str, base: str | None = None) -> str | None:
+    """Caminho do objeto no store (None se o hash for inválido)."""
+    sha = (sha or "").strip().lower()
+    if not _valid_sha(sha):
+        return None
+    base = base or anexos_dir()
+    return os.path.join(base, sha[:2], sha[2:4], sha)
+
+
+def guardar_stream(stream, base: str | None = None, limite: int | None = None, validar=None):
+    """
+    Copia o stream para o store em blocos, calculando o SHA-256 no caminho.
+    - validar(primeiro_bloco): levanta AnexoInvalido se o conteúdo não servir;
+    - limite: tamanho máximo em bytes (AnexoInvalido ao passar, sem ler o resto).
+    Se o conteúdo já existir, só descarta o temporário (dedupe).
+    Retorna (sha256, tamanho).
+    """
+    base = base or anexos_dir()
+    tmp_dir = os.path.join(base, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    h = hashlib.sha256()
+    tamanho = 0
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if validar and tamanho == 0:
+                    validar(chunk)
+                if limite and tamanho + len(chunk) > limite:
+                    raise AnexoGrande(f"❌ O anexo passa do limite de {limite // (1024 * 1024)} MB.")
+                h.update(chunk)
+                out.write(chunk)
+                tamanho += len(chunk)
+
+        if validar and tamanho == 0:
+            validar(b"")
+
+        sha = h.hexdigest()
+        _publicar(tmp_path, sha, base)
+        return sha, tamanho
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _publicar(tmp_path: str, sha: str, base: str):
+    destino = caminho_objeto(sha, base)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    if os.path.exists(destino):
+        os.remove(tmp_path)
+        # reaproveitado agora: para limpar_orfaos() é um objeto novo (o INSERT ainda vem)
+        os.utime(destino)
+    else:
+        os.replace(tmp_path, destino)
+
+
+def vincular(sha: str, destino: str, base: str | None = None):
+    """
+    Coloca o objeto também em `destino` (pasta do protocolo).
+    Usa hardlink (mesmo arquivo físico); se não der (outro disco/FS), copia.
+    O arquivo é montado com nome temporário na própria pasta e entra no lugar
+    com rename atômico: ninguém vê um PDF pela metade.
+    """
+    origem = caminho_objeto(sha, base)
+    if not origem or not os.path.isfile(origem):
+        raise FileNotFoundError(sha)
+
+    # já é o mesmo arquivo (tarefa repetida): rename de hardlink sobre ele mesmo não faz nada
+    if os.path.exists(destino) and os.path.samefile(origem, destino):
+        return
+
+    pasta = os.path.dirname(destino)
+    fd, tmp_path = tempfile.mkstemp(dir=pasta, prefix=".", suffix=".part")
+    os.close(fd)
+    os.remove(tmp_path)
+    try:
+        try:
+            os.link(origem, tmp_path)
+        except OSError:
+            shutil.copyfile(origem, tmp_path)
+        os.replace(tmp_path, destino)
+    finally:
+        # erro, ou rename que não moveu nada (destino ligado ao mesmo objeto)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+# =========================
+# Limpeza do store
+# =========================
+# tabelas com a coluna arquivo_sha256 (migração 0004)
+TABELAS = [
+    "solicitacoes_admissional",
+    "solicitacoes_avaliacao_medica",
+    "solicitacoes_retorno_trabalho",
+]
+
+
+def _referenciados(conn):
+    out = set()
+    for t in TABELAS:
+        cols = [r[1] for r in conn.execute(f'PRAGMA table_info("{t}")').fetchall()]
+        if "arquivo_sha256" not in cols:
+            continue
+        rows = conn.execute(
+            f'SELECT DISTINCT arquivo_sha256 FROM "{t}" WHERE arquivo_sha256 IS NOT NULL'
+        )
+        for (sha,) in rows:
+            out.add(sha.strip().lower())
+    return out
+
+
+def limpar_orfaos(conn, base: str | None = None, idade_min_s: int = 3600, dry: bool = False):
+    """
+    Apaga do store os objetos que sobraram de solicitações excluídas (o DELETE da linha e a
+    remoção da pasta do protocolo não mexem no store, que pode ter o mesmo arquivo de outra).
+    Órfão = nenhuma linha com esse arquivo_sha256 E nenhum hardlink fora do store (st_nlink 1:
+    o PDF final do consultor só existe como hardlink na pasta do protocolo).
+    Objetos e temporários mais novos que idade_min_s ficam (upload em andamento, INSERT ainda
+    não feito). Retorna (arquivos, bytes).
+    """
+    base = base or anexos_dir()
+    limite = time.time() - idade_min_s
+    tmp_dir = os.path.join(base, "tmp")
+
+    candidatos = []
+    for raiz, _dirs, arquivos in os.walk(base):
+        for nome in arquivos:
+            caminho = os.path.join(raiz, nome)
+            try:
+                st = os.stat(caminho)
+            except OSError:
+                continue
+            if st.st_mtime > limite:
+                continue
+            if raiz == tmp_dir:
+                candidatos.append((caminho, st.st_size))  # .part abandonado
+            elif _valid_sha(nome) and st.st_nlink <= 1:
+                candidatos.append((caminho, st.st_size))
+
+    # lidos DEPOIS de varrer: linha inserida no meio já conta
+    usados = _referenciados(conn)
+
+    arquivos = tamanho = 0
+    for caminho, bytes_ in candidatos:
+        if os.path.basename(caminho) in usados:
+            continue
+        try:
+            # reaproveitado (upload com o mesmo conteúdo) desde a varredura: fica
+            if os.stat(caminho).st_mtime > limite:
+                continue
+            if not dry:
+                os.remove(caminho)
+        except OSError:
+            continue
+        arquivos += 1
+        tamanho += bytes_
+    return arquivos, tamanho
@@ -0,0 +1,310 @@
+# backend/assets.py
+"""
+Arquivos estáticos com hash no nome (cache "para sempre" no navegador).
+
+Build (python build_assets.py): copia static/css, static/js e static/assets para ASSETS_DIST
+(padrão static/dist) como <nome>.<hash>.<ext>, grava as variantes .gz / .br dos arquivos de
+texto e o manifest.json ("css/home.css" -> "css/home.1a2b3c4d5e.css").
+- CSS: url("../assets/x.png") é reescrito para o nome com hash antes de calcular o hash do CSS;
+- nada é apagado por padrão: páginas antigas (ou outro worker ainda no build anterior)
+  continuam achando os arquivos. --limpar remove o que saiu do manifest.
+
+Pacotes por página (ENTRADAS): o CSS e o JS de cada tela minificados (backend/minificar.py) e
+juntos em bundles/<entrada>.<hash>.css|js, também no manifest ("bundles/login.css" -> ...).
+Telas marcadas "inline" (login e homes, CSS pequeno) levam o CSS dentro do <style> do HTML:
+a primeira pintura não espera nenhum pedido de CSS.
+
+Runtime: templates usam {{ estilos('login') }} / {{ scripts('login') }} para os pacotes e
+{{ asset('assets/icone.png') }} para arquivos soltos. Com manifest, a URL é /dist/<nome com hash>
+(rota routes/assets.py: Cache-Control immutable + .br/.gz conforme Accept-Encoding);
+sem manifest (build não rodou), cai no url_for('static') de sempre.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+
+from flask import current_app, url_for
+from markupsafe import Markup, escape
+
+from backend import minificar
+
+try:
+    import brotli  # opcional: sem o pacote, só gera .gz
+except ImportError:
+    brotli = None
+
+MANIFEST = "manifest.json"
+PASTAS = ["assets", "css", "js"]  # ordem importa: CSS referencia assets/
+PACOTES = "bundles"
+
+# pacote por tela: arquivos de static/ na ordem em que entram
+ENTRADAS = {
+    "login": {"css": ["css/login.css"], "js": ["js/login.js"], "inline": True},
+    "home": {"css": ["css/home.css"], "inline": True},
+    "home_consultor": {"css": ["css/home_consultor.css"], "inline": True},
+    "controle_usuarios": {"css": ["css/controle_usuarios.css"], "js": ["js/controle_usuarios.js"]},
+    "solicitacao_agendamento": {
+        "css": ["css/solicitacao_agendamento.css"],
+        "js": ["js/solicitacao_agendamento.js"],
+    },
+    "minhas_solicitacoes": {"css": ["css/minhas_solicitacoes.css"], "js": ["js/minhas_solicitacoes.js"]},
+    "solicitacoes_consultor": {
+        "css": ["css/solicitacoes_consultor.css"],
+        "js": ["js/solicitacoes_consultor.js"],
+    },
+}
+
+# CSS "inline" maior que isso vai como <link> (passaria da 1ª janela do TCP, ~14 KB)
+INLINE_MAX = 14 * 1024
+
+# só vale comprimir texto (png/jpg já são comprimidos)
+_COMPRIMIR = {".css", ".js", ".svg", ".json", ".txt", ".html"}
+_CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+# =========================
+# Build
+# =========================
+def _hash(dados):
+    return hashlib.sha256(dados).hexdigest()[:10]
+
+
+def _nome_com_hash(relativo, dados):
+    raiz, ext = os.path.splitext(relativo)
+    return f"{raiz}.{_hash(dados)}{ext}"
+
+
+def _gravar(caminho, dados):
+    """Grava só se ainda não existe (nome com hash = conteúdo igual)."""
+    if os.path.exists(caminho):
+        return
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    tmp = caminho + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(dados)
+    os.replace(tmp, caminho)
+
+
+def _reescrever_css(relativo, texto, manifest):
+    """url(...) relativo -> nome com hash (mesma pasta relativa dentro do dist)."""
+    pasta = os.path.dirname(relativo)
+
+    def trocar(m):
+        aspas, alvo = m.group(1), m.group(2).strip()
+        if alvo.startswith(("data:", "http:", "https:", "//", "/", "#")):
+            return m.group(0)
+        limpo, sep, resto = alvo.partition("?")
+        if not sep:
+            limpo, sep, resto = alvo.partition("#")
+        chave = os.path.normpath(os.path.join(pasta, limpo)).replace(os.sep, "/")
+        novo = manifest.get(chave)
+        if not novo:
+            return m.group(0)
+        rel = os.path.relpath(novo, pasta or ".").replace(os.sep, "/")
+        return f"url({aspas}{rel}{sep}{resto}{aspas})"
+
+    return _CSS_URL.sub(trocar, texto)
+
+
+def _variantes(caminho, dados):
+    """.gz (e .br, se houver o pacote) ao lado do arquivo, só quando ficam menores."""
+    gz = gzip.compress(dados, compresslevel=9, mtime=0)
+    if len(gz) < len(dados):
+        _gravar(caminho + ".gz", gz)
+    if brotli is not None:
+        br = brotli.compress(dados, quality=11)
+        if len(br) < len(dados):
+            _gravar(caminho + ".br", br)
+
+
+def construir(static_dir, dist_dir, limpar=False):
+    """Gera o dist + manifest. Retorna o manifest {original: com hash}."""
+    manifest = {}
+
+    for pasta in PASTAS:
+        base = os.path.join(static_dir, pasta)
+        if not os.path.isdir(base):
+            continue
+        for raiz, _dirs, arquivos in os.walk(base):
+            for nome in sorted(arquivos):
+                origem = os.path.join(raiz, nome)
+                relativo = os.path.relpath(origem, static_dir).replace(os.sep, "/")
+
+                with open(origem, "rb") as f:
+                    dados = f.read()
+                if relativo.endswith(".css"):
+                    texto = _reescrever_css(relativo, dados.decode("utf-8"), manifest)
+                    dados = texto.encode("utf-8")
+
+                final = _nome_com_hash(relativo, dados)
+                destino = os.path.join(dist_dir, final)
+                _gravar(destino, dados)
+                if os.path.splitext(nome)[1].lower() in _COMPRIMIR:
+                    _variantes(destino, dados)
+                manifest[relativo] = final
+
+    _construir_pacotes(static_dir, dist_dir, manifest)
+
+    os.makedirs(dist_dir, exist_ok=True)
+    tmp = os.path.join(dist_dir, MANIFEST + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, os.path.join(dist_dir, MANIFEST))
+
+    if limpar:
+        _limpar(dist_dir, manifest)
+    return manifest
+
+
+def _construir_pacotes(static_dir, dist_dir, manifest):
+    """Um .css e um .js minificados por entrada de ENTRADAS (url() já com os nomes com hash)."""
+    for entrada, cfg in ENTRADAS.items():
+        for tipo, minificar_ in (("css", minificar.css), ("js", minificar.js)):
+            partes = []
+            for relativo in cfg.get(tipo, []):
+                with open(os.path.join(static_dir, relativo), encoding="utf-8") as f:
+                    texto = f.read()
+                if tipo == "css":
+                    # bundles/ fica no mesmo nível de css/: o url() relativo continua valendo
+                    texto = _reescrever_css(relativo, texto, manifest)
+                partes.append(minificar_(texto))
+            if not partes:
+                continue
+
+            # JS: cada arquivo termina o comando antes do próximo começar
+            dados = ("\n" if tipo == "css" else ";\n").join(partes).encode("utf-8")
+            relativo = f"{PACOTES}/{entrada}.{tipo}"
+            final = _nome_com_hash(relativo, dados)
+            destino = os.path.join(dist_dir, final)
+            _gravar(destino, dados)
+            _variantes(destino, dados)
+            manifest[relativo] = final
+
+
+def _limpar(dist_dir, manifest):
+    validos = set(manifest.values())
+    for raiz, _dirs, arquivos in os.walk(dist_dir):
+        for nome in arquivos:
+            relativo = os.path.relpath(os.path.join(raiz, nome), dist_dir).replace(os.sep, "/")
+            base = re.sub(r"\.(gz|br)$", "", relativo)
+            if relativo != MANIFEST and base not in validos:
+                os.remove(os.path.join(raiz, nome))
+    for raiz, dirs, arquivos in os.walk(dist_dir, topdown=False):
+        if raiz != dist_dir and not dirs and not arquivos:
+            shutil.rmtree(raiz, ignore_errors=True)
+
+
+# =========================
+# Runtime
+# =========================
+_lock = threading.Lock()
+_manifests = {}  # caminho do manifest -> (mtime, {original: com hash})
+
+
+def dist_dir():
+    return os.path.abspath(current_app.config.get("ASSETS_DIST", "static/dist"))
+
+
+def manifest():
+    """Manifest atual (relido só se o arquivo mudou: novo build com o portal no ar)."""
+    caminho = os.path.join(dist_dir(), MANIFEST)
+    try:
+        mtime = os.stat(caminho).st_mtime_ns
+    except OSError:
+        return {}
+
+    item = _manifests.get(caminho)
+    if item is not None and item[0] == mtime:
+        return item[1]
+
+    with _lock:
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        _manifests[caminho] = (mtime, dados)
+    return dados
+
+
+def versao():
+    """Identifica o build atual (mtime do manifest; 0 = sem build). Entra na chave do cache de páginas."""
+    try:
+        return os.stat(os.path.join(dist_dir(), MANIFEST)).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def asset(nome):
+    """URL de um arquivo de static/ (nome com hash se o build já rodou)."""
+    final = manifest().get(nome)
+    if final:
+        return url_for("assets.arquivo", nome=final)
+    return url_for("static", filename=nome)
+
+
+_inline = {}  # nome com hash -> texto (nome com hash = conteúdo fixo, nunca invalida)
+
+
+def _css_inline(final):
+    texto = _inline.get(final)
+    if texto is None:
+        try:
+            with open(os.path.join(dist_dir(), final), encoding="utf-8") as f:
+                texto = f.read()
+        except OSError:
+            return None
+        _inline[final] = texto
+    if len(texto) > INLINE_MAX:
+        return None
+
+    # dentro do HTML o url() relativo apontaria para a página: vira URL absoluta do /dist
+    pasta = os.path.dirname(final)
+
+    def absoluta(m):
+        alvo = m.group(2).strip()
+        if alvo.startswith(("data:", "http:", "https:", "//", "/", "#")):
+            return m.group(0)
+        nome = os.path.normpath(os.path.join(pasta, alvo)).replace(os.sep, "/")
+        return f'url("{url_for("assets.arquivo", nome=nome)}")'
+
+    return _CSS_URL.sub(absoluta, texto)
+
+
+def estilos(entrada):
+    """CSS da tela: <style> (entrada inline), <link> do pacote, ou os arquivos soltos sem build."""
+    cfg = ENTRADAS[entrada]
+    final = manifest().get(f"{PACOTES}/{entrada}.css")
+    if not final:
+        return Markup("\n".join(f'<link rel="stylesheet" href="{escape(asset(c))}" />' for c in cfg["css"]))
+
+    if cfg.get("inline"):
+        texto = _css_inline(final)
+        if texto is not None:
+            return Markup(f"<style>{texto}</style>")
+
+    href = url_for("assets.arquivo", nome=final)
+    return Markup(f'<link rel="stylesheet" href="{escape(href)}" />')
+
+
+def scripts(entrada, defer=False):
+    """<script> do pacote JS da tela (ou dos arquivos soltos sem build)."""
+    cfg = ENTRADAS[entrada]
+    final = manifest().get(f"{PACOTES}/{entrada}.js")
+    if final:
+        srcs = [url_for("assets.arquivo", nome=final)]
+    else:
+        srcs = [asset(j) for j in cfg.get("js", [])]
+
+    attr = " defer" if defer else ""
+    return Markup("\n".join(f'<script{attr} src="{escape(src)}"></script>' for src in srcs))
+
+
+def init_assets(app):
+    app.jinja_env.globals["asset"] = asset
+    app.jinja_env.globals["estilos"] = estilos
+    app.jinja_env.globals["scripts"] = scripts
@@ -0,0 +1,194 @@
+# backend/busca.py
+"""
+Busca textual (FTS5) das solicitações, para a fila do consultor.
+
+Um índice só ("solicitacoes_busca") para as seis tabelas solicitacoes_*: uma linha por
+solicitação com funcionario, cpf (como digitado e só dígitos), empresa, protocolo,
+local_agendar e resposta_consultor. O rowid do índice codifica a origem
+(rowid_origem * 8 + código da tabela), então os triggers atualizam/apagam por rowid,
+sem varrer o índice.
+
+Criação: migração backend/migrations/0006_busca_fts.py (usa criar_indice daqui).
+Reconstrução: python database/migrate.py --reindexar-busca
+"""
+import re
+
+TABELA = "solicitacoes_busca"
+
+# código fixo por tabela (vai no rowid do índice: NÃO mudar os números existentes)
+CODIGOS = {
+    "solicitacoes_admissional": 1,
+    "solicitacoes_periodico": 2,
+    "solicitacoes_demissional": 3,
+    "solicitacoes_retorno_trabalho": 4,
+    "solicitacoes_avaliacao_medica": 5,
+    "solicitacoes_mudanca_riscos": 6,
+}
+_TABELA_POR_CODIGO = {v: k for k, v in CODIGOS.items()}
+
+# coluna do índice -> nomes possíveis na tabela de origem
+COLUNAS = {
+    "funcionario": ["funcionario", "colaborador"],
+    "cpf": ["cpf", "cpf_cliente"],
+    "empresa": ["empresa"],
+    "protocolo": ["protocolo"],
+    "local_agendar": ["local_agendar"],
+    "resposta_consultor": ["resposta_consultor"],
+}
+
+# peso de cada coluna no bm25 (mesma ordem do CREATE: cpf_num vem logo depois de cpf)
+_PESOS = "3.0, 5.0, 5.0, 2.0, 10.0, 1.0, 1.0"
+
+
+def _expr_origem(cols, coluna, prefixo):
+    for c in COLUNAS[coluna]:
+        if c in cols:
+            return f'{prefixo}."{c}"'
+    return "NULL"
+
+
+def _valores(cols, prefixo, codigo):
+    cpf = _expr_origem(cols, "cpf", prefixo)
+    cpf_num = "NULL" if cpf == "NULL" else f"replace(replace(replace({cpf}, '.', ''), '-', ''), ' ', '')"
+    return ", ".join([
+        f"{prefixo}.rowid * 8 + {codigo}",
+        _expr_origem(cols, "funcionario", prefixo),
+        cpf,
+        cpf_num,
+        _expr_origem(cols, "empresa", prefixo),
+        _expr_origem(cols, "protocolo", prefixo),
+        _expr_origem(cols, "local_agendar", prefixo),
+        _expr_origem(cols, "resposta_consultor", prefixo),
+    ])
+
+
+_INSERT = (
+    f"INSERT INTO {TABELA} (rowid, funcionario, cpf, cpf_num, empresa, protocolo, "
+    "local_agendar, resposta_consultor)"
+)
+
+
+def _colunas(conn, tabela):
+    return [r[1] for r in conn.execute(f'PRAGMA table_info("{tabela}")').fetchall()]
+
+
+def criar_indice(conn, reconstruir=False):
+    """
+    Cria (se faltar) o índice FTS5 e os triggers das seis tabelas; com reconstruir=True
+    (ou índice recém-criado) recarrega todo o conteúdo. Idempotente.
+    Os triggers são recriados sempre: pegam colunas adicionadas depois (ex.: resposta_consultor).
+    """
+    existia = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (TABELA,)
+    ).fetchone()
+
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA} USING fts5(
+            funcionario, cpf, cpf_num, empresa, protocolo, local_agendar, resposta_consultor,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+
+    if reconstruir or not existia:
+        conn.execute(f"DELETE FROM {TABELA}")
+
+    for tabela, codigo in CODIGOS.items():
+        cols = _colunas(conn, tabela)
+        if not cols:
+            continue
+
+        for sufixo in ("ai", "ad", "au"):
+            conn.execute(f'DROP TRIGGER IF EXISTS "trg_{tabela}_busca_{sufixo}"')
+
+        conn.execute(f"""
+            CREATE TRIGGER "trg_{tabela}_busca_ai" AFTER INSERT ON "{tabela}" BEGIN
+                {_INSERT} VALUES ({_valores(cols, "NEW", codigo)});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER "trg_{tabela}_busca_ad" AFTER DELETE ON "{tabela}" BEGIN
+                DELETE FROM {TABELA} WHERE rowid = OLD.rowid * 8 + {codigo};
+            END
+        """)
+        # só reindexa quando muda coluna do índice (mudança de status não mexe no FTS)
+        indexadas = [c for nomes in COLUNAS.values() for c in nomes if c in cols]
+        conn.execute(f"""
+            CREATE TRIGGER "trg_{tabela}_busca_au"
+            AFTER UPDATE OF {", ".join(f'"{c}"' for c in indexadas)} ON "{tabela}" BEGIN
+                DELETE FROM {TABELA} WHERE rowid = OLD.rowid * 8 + {codigo};
+                {_INSERT} VALUES ({_valores(cols, "NEW", codigo)});
+            END
+        """)
+
+        if reconstruir or not existia:
+            conn.execute(f'{_INSERT} SELECT {_valores(cols, "t", codigo)} FROM "{tabela}" AS t')
+
+    if reconstruir or not existia:
+        conn.execute(f"INSERT INTO {TABELA} ({TABELA}) VALUES ('optimize')")
+
+
+def tem_indice(schema):
+    return schema.has_table(TABELA)
+
+
+def consulta_fts(texto):
+    """
+    Texto digitado -> expressão MATCH segura: cada termo vira prefixo ("ter"*), todos com AND.
+    Pontuação (CPF com ponto/traço) só separa termos. None se não sobrar termo.
+    """
+    termos = re.findall(r"\w+", texto or "")
+    if not termos:
+        return None
+    return " AND ".join(f'"{t}"*' for t in termos)
+
+
+def filtro_sql(tabela):
+    """
+    Condição "rowid IN (...)" para usar no WHERE da tabela de origem; parâmetro: consulta_fts(...).
+    None se a tabela não está no índice.
+    """
+    codigo = CODIGOS.get(tabela)
+    if not codigo:
+        return None
+    return (
+        f"rowid IN (SELECT rowid / 8 FROM {TABELA} "
+        f"WHERE {TABELA} MATCH ? AND rowid % 8 = {codigo})"
+    )
+
+
+def buscar(db, texto, limite=20):
+    """
+    Melhores resultados (bm25) em todas as tabelas:
+    [{"tabela", "rid", "protocolo", "funcionario", "cpf", "empresa", "score"}, ...]
+    """
+    consulta = consulta_fts(texto)
+    if not consulta:
+        return []
+
+    rows = db.execute(
+        f"""
+        SELECT rowid, protocolo, funcionario, cpf, empresa, bm25({TABELA}, {_PESOS}) AS score
+        FROM {TABELA}
+        WHERE {TABELA} MATCH ?
+        ORDER BY score
+        LIMIT ?
+        """,
+        (consulta, limite),
+    ).fetchall()
+
+    out = []
+    for r in rows:
+        tabela = _TABELA_POR_CODIGO.get(r["rowid"] % 8)
+        if not tabela:
+            continue
+        out.append({
+            "tabela": tabela,
+            "rid": r["rowid"] // 8,
+            "protocolo": r["protocolo"],
+            "funcionario": r["funcionario"],
+            "cpf": r["cpf"],
+            "empresa": r["empresa"],
+            "score": r["score"],
+        })
+    return out
@@ -0,0 +1,101 @@
+# backend/cache_paginas.py
+"""
+Cache do HTML das telas de listagem ("Minhas solicitações" e fila do consultor), por processo.
+
+A validade vem do banco (backend/db.py, "dados_versao"): uma versão por tabela, incrementada por
+trigger a cada INSERT / UPDATE / DELETE nas seis solicitacoes_* (e em solicitacao_docs, se existir).
+Quem muda arquivos sem mexer nessas tabelas (tarefa que coloca o PDF na pasta) chama tocar().
+- chave = tela + usuário/perfil + filtros da URL;
+- hit = 1 SELECT em dados_versao (versões iguais às da renderização) -> devolve o HTML pronto;
+- miss = a página sai em stream e é guardada no caminho (se não for grande demais);
+- vale também entre processos (a versão está no banco, não na memória).
+PAGE_CACHE_TTL_S é só uma rede de segurança para mudanças feitas fora do portal.
+
+Criação: migração backend/migrations/0011_dados_versao.py (usa criar_versoes daqui).
+"""
+from flask import current_app, stream_with_context
+
+from backend import assets, db as _db
+from backend.alteracoes import TABELAS
+from backend.db import CacheVersionado, tocar  # noqa: F401  (tocar: usado pelas rotas)
+
+TABELA = _db.TABELA_VERSOES
+
+# além das solicitações, a lista de documentos também aparece nas telas
+_TABELAS_VERSIONADAS = TABELAS + ["solicitacao_docs"]
+
+_paginas = CacheVersionado()
+
+
+def criar_versoes(conn):
+    """Tabela de versões + triggers das tabelas que aparecem nas telas. Idempotente."""
+    _db.criar_versoes(conn, _TABELAS_VERSIONADAS)
+
+
+def ativo():
+    return bool(current_app.config.get("PAGE_CACHE"))
+
+
+def pagina(db, chave, gerar):
+    """
+    Página `chave` (tupla): o HTML do cache (str) ou o stream de gerar() (pedaços de
+    stream() abaixo). A conexão `db` fica com a página: volta ao pool na hora (hit) ou no fim
+    do stream. O stream vai sendo guardado para o cache enquanto couber em PAGE_CACHE_ITEM_KB.
+    """
+    if not ativo():
+        return _fechando(gerar(), db)
+
+    cfg = current_app.config
+    _paginas.maximo = cfg.get("PAGE_CACHE_MAX", 256)
+    # o HTML leva as URLs dos estáticos: build novo (manifest novo) = página nova
+    chave = tuple(chave) + (assets.versao(),)
+
+    html, marca = _paginas.consultar(db, chave, ttl=cfg.get("PAGE_CACHE_TTL_S", 300))
+    if html is not None:
+        db.close()
+        return html
+
+    limite = cfg.get("PAGE_CACHE_ITEM_KB", 4096) * 1024
+    return _fechando(_guardando(gerar(), marca, limite), db)
+
+
+def stream(template, **contexto):
+    """
+    stream_template com buffer: o Jinja sozinho solta cada pedacinho do template (dezenas de
+    bytes) como um pedaço do stream. Junta PAGE_STREAM_BUFFER pedaços por vez (200 = ~14 KB).
+    """
+    app = current_app._get_current_object()
+    app.update_template_context(contexto)
+    pedacos = app.jinja_env.get_template(template).stream(contexto)
+    buffer = app.config.get("PAGE_STREAM_BUFFER", 200)
+    if buffer > 1:
+        pedacos.enable_buffering(buffer)
+    return stream_with_context(pedacos)
+
+
+def _guardando(pedacos, marca, limite):
+    guardados = []
+    total = 0
+    for pedaco in pedacos:
+        if guardados is not None:
+            total += len(pedaco)
+            if total <= limite:
+                guardados.append(pedaco)
+            else:
+                # página grande demais: não guarda (a memória do worker não cresce com a lista)
+                guardados = None
+        yield pedaco
+    if guardados is not None:
+        _paginas.guardar(marca, "".join(guardados))
+
+
+def _fechando(pedacos, db):
+    try:
+        yield from pedacos
+    finally:
+        db.close()
+
+
+def limpar():
+    """Descarta todo o cache deste processo."""
+    _paginas.limpar()
@@ -0,0 +1,153 @@
+# backend/compressao.py
+"""
+Compressão das respostas (HTML das listagens, JSON das APIs) conforme o Accept-Encoding.
+
+after_request: se o navegador aceita br (pacote brotli instalado) ou gzip, o tipo é texto
+(COMPRESS_MIMETYPES) e o corpo passa de COMPRESS_MIN_BYTES, comprime.
+- resposta em stream (stream_template, geradores): comprime conforme os pedaços chegam e dá
+  flush a cada COMPRESS_FLUSH_KB de texto, então o navegador continua recebendo (e pintando)
+  aos poucos sem que cada pedacinho do template vire um bloco comprimido à parte;
+- não mexe em: PDF/imagem/zip (não estão na lista), SSE (text/event-stream), arquivos enviados
+  com send_file (downloads e estáticos: o build já gera .gz/.br), resposta que já tem
+  Content-Encoding, 206/Range, 204/304 e Cache-Control: no-transform.
+"""
+import gzip
+import zlib
+
+from flask import request
+
+try:
+    import brotli  # opcional: sem o pacote, só gzip
+except ImportError:
+    brotli = None
+
+MIMETYPES_PADRAO = {
+    "text/html",
+    "text/css",
+    "text/plain",
+    "text/csv",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+}
+
+
+def _escolher_encoding():
+    aceitos = request.accept_encodings
+    br = aceitos["br"] if brotli is not None else 0
+    gz = aceitos["gzip"]
+    if br and br >= gz:
+        return "br"
+    if gz:
+        return "gzip"
+    return None
+
+
+def _compressor(encoding, nivel):
+    """Objeto com process(bytes) / flush() / finish(), igual para br e gzip."""
+    if encoding == "br":
+        return brotli.Compressor(quality=min(nivel, 11))
+    return _Gzip(nivel)
+
+
+class _Gzip:
+    def __init__(self, nivel):
+        self._z = zlib.compressobj(nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def process(self, dados):
+        return self._z.compress(dados)
+
+    def flush(self):
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._z.flush(zlib.Z_FINISH)
+
+
+def _comprimir_tudo(encoding, dados, nivel):
+    if encoding == "br":
+        return brotli.compress(dados, quality=min(nivel, 11))
+    return gzip.compress(dados, compresslevel=nivel)
+
+
+def _stream_comprimido(origem, encoding, nivel, flush_bytes):
+    comp = _compressor(encoding, nivel)
+    # flush a cada pedaço zera o que o compressor acumulou e acrescenta moldura: com os
+    # pedacinhos do template, a página quase não encolhe. Junta até flush_bytes de entrada.
+    saida = []
+    pendente = 0
+    try:
+        for pedaco in origem:
+            if isinstance(pedaco, str):
+                pedaco = pedaco.encode("utf-8")
+            saida.append(comp.process(pedaco))
+            pendente += len(pedaco)
+            if pendente >= flush_bytes:
+                saida.append(comp.flush())
+                yield b"".join(saida)
+                saida = []
+                pendente = 0
+        saida.append(comp.finish())
+        yield b"".join(saida)
+    finally:
+        fechar = getattr(origem, "close", None)
+        if fechar is not None:
+            fechar()
+
+
+def _elegivel(resp, mimetypes):
+    if request.method == "HEAD":
+        return False
+    if resp.status_code < 200 or resp.status_code in (204, 206, 304):
+        return False
+    if resp.mimetype not in mimetypes:
+        return False
+    if resp.direct_passthrough:
+        # arquivo (send_file / static): os estáticos já têm .gz/.br prontos no build
+        return False
+    if "Content-Encoding" in resp.headers or "Content-Range" in resp.headers:
+        return False
+    if "no-transform" in (resp.headers.get("Cache-Control") or ""):
+        return False
+    return True
+
+
+def init_compressao(app):
+    @app.after_request
+    def _comprimir(resp):
+        cfg = app.config
+        if not cfg.get("COMPRESS"):
+            return resp
+
+        mimetypes = cfg.get("COMPRESS_MIMETYPES") or MIMETYPES_PADRAO
+        if not _elegivel(resp, mimetypes):
+            return resp
+
+        # a resposta muda conforme o Accept-Encoding: caches precisam saber
+        resp.vary.add("Accept-Encoding")
+
+        encoding = _escolher_encoding()
+        if encoding is None:
+            return resp
+
+        nivel = cfg.get("COMPRESS_LEVEL", 6)
+
+        if resp.is_streamed:
+            # tamanho desconhecido: comprime sempre (é o caso das páginas grandes em stream)
+            flush_bytes = cfg.get("COMPRESS_FLUSH_KB", 16) * 1024
+            resp.response = _stream_comprimido(resp.response, encoding, nivel, flush_bytes)
+            resp.headers.pop("Content-Length", None)
+        else:
+            dados = resp.get_data()
+            if len(dados) < cfg.get("COMPRESS_MIN_BYTES", 500):
+                return resp
+            resp.set_data(_comprimir_tudo(encoding, dados, nivel))
+
+        resp.headers["Content-Encoding"] = encoding
+
+        # ETag forte é do corpo sem compressão: a variante comprimida ganha a sua
+        etag, fraca = resp.get_etag()
+        if etag:
+            resp.set_etag(f"{etag}-{encoding}", weak=fraca)
+        return resp
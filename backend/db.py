@@ -1,10 +1,346 @@
+import os
+import queue
 import sqlite3
-from flask import g, current_app
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import quote
+from flask import g, current_app, has_app_context, has_request_context, request
+
+# PRAGMAs que só fazem sentido (ou só são permitidos) em conexão de escrita
+_SO_ESCRITA = {"journal_mode", "synchronous"}
+
+
+class _Conexao(sqlite3.Connection):
+    """
+    Conexão do portal.
+    - avulsa: close() roda PRAGMA optimize e fecha (recomendação do SQLite);
+    - do pool: close() só devolve a conexão para o pool (pode chamar mais de uma vez);
+      o PRAGMA optimize roda na devolução, a cada SQLITE_OPTIMIZE_A_CADA empréstimos.
+    """
+
+    _pool = None
+    _em_uso = False
+    _emprestimo = 0  # conta os empréstimos (o teardown só devolve o empréstimo que é dele)
+
+    def close(self):
+        if self._pool is not None:
+            if self._em_uso:
+                self._em_uso = False
+                self._pool.devolver(self)
+            return
+        self._fechar()
+
+    def _otimizar(self):
+        try:
+            self.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+
+    def _fechar(self):
+        self._otimizar()
+        super().close()
+
+
+class _Pool:
+    """
+    Pool simples por processo: no máximo `tamanho` conexões emprestadas ao mesmo tempo;
+    as devolvidas ficam abertas para o próximo request (sem reabrir + PRAGMAs a cada vez).
+    Como elas quase nunca fecham de verdade, o PRAGMA optimize roda a cada `otimizar_a_cada`
+    empréstimos de cada conexão (0 = nunca; só faz sentido no pool de escrita: ANALYZE grava).
+    """
+
+    def __init__(self, abrir, tamanho, otimizar_a_cada=0):
+        self._abrir = abrir
+        self._otimizar_a_cada = otimizar_a_cada
+        self._livres = queue.LifoQueue()
+        self._vagas = threading.BoundedSemaphore(tamanho)
+
+    def pegar(self, timeout):
+        if not self._vagas.acquire(timeout=timeout):
+            raise sqlite3.OperationalError("pool de conexões esgotado")
+        try:
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                conn = self._abrir()
+                conn._pool = self
+        except Exception:
+            self._vagas.release()
+            raise
+        conn._em_uso = True
+        conn._emprestimo += 1
+        return conn
+
+    def devolver(self, conn):
+        try:
+            # request que saiu no meio de uma transação não pode "vazar" lock para o próximo
+            if conn.in_transaction:
+                conn.rollback()
+            if self._otimizar_a_cada and conn._emprestimo % self._otimizar_a_cada == 0:
+                conn._otimizar()
+            self._livres.put(conn)
+        except sqlite3.Error:
+            conn._pool = None
+            conn._fechar()
+        finally:
+            self._vagas.release()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def db_path():
+    return os.path.abspath(current_app.config.get("DATABASE", "database/Users.db"))
+
+
+def connect(path=None, somente_leitura=False, **kwargs):
+    """
+    Conexão nova, já configurada (ÚNICO lugar que abre o banco nas rotas):
+    - PRAGMAs de SQLITE_PRAGMAS (busy_timeout, cache_size, mmap_size, temp_store, WAL...);
+    - cache de statements maior (SQLITE_CACHED_STATEMENTS);
+    - row_factory = sqlite3.Row;
+    - PRAGMA optimize no close().
+    somente_leitura=True: abre com mode=ro + query_only (não participa do lock de escrita).
+    """
+    cfg = current_app.config
+    pragmas = cfg.get("SQLITE_PRAGMAS", {})
+    path = path or db_path()
+
+    if somente_leitura:
+        alvo = f"file:{quote(path)}?mode=ro"
+        kwargs["uri"] = True
+    else:
+        alvo = path
+
+    conn = sqlite3.connect(
+        alvo,
+        timeout=pragmas.get("busy_timeout", 5000) / 1000,
+        cached_statements=cfg.get("SQLITE_CACHED_STATEMENTS", 128),
+        factory=_Conexao,
+        **kwargs,
+    )
+    conn.row_factory = sqlite3.Row
+    for nome, valor in pragmas.items():
+        if somente_leitura and nome in _SO_ESCRITA:
+            continue
+        conn.execute(f"PRAGMA {nome} = {valor}")
+    if somente_leitura:
+        conn.execute("PRAGMA query_only = 1")
+    return conn
+
+
+def _pool(tipo):
+    app = current_app._get_current_object()
+    path = db_path()
+    chave = (path, tipo)
+
+    pool = _pools.get(chave)
+    if pool is not None:
+        return pool
+
+    with _pools_lock:
+        pool = _pools.get(chave)
+        if pool is None:
+            somente_leitura = tipo == "leitura"
+            tamanho = app.config.get("SQLITE_POOL_LEITURA" if somente_leitura else "SQLITE_POOL_ESCRITA", 4)
+            # conexão query_only não consegue gravar o ANALYZE do optimize
+            otimizar_a_cada = 0 if somente_leitura else app.config.get("SQLITE_OPTIMIZE_A_CADA", 500)
+
+            def abrir():
+                with app.app_context():
+                    return connect(path, somente_leitura=somente_leitura, check_same_thread=False)
+
+            pool = _Pool(abrir, tamanho, otimizar_a_cada)
+            _pools[chave] = pool
+    return pool
+
+
+def _timeout_pool():
+    return current_app.config.get("SQLITE_PRAGMAS", {}).get("busy_timeout", 5000) / 1000
+
+
+def _emprestar(tipo, vinculada_ao_request):
+    conn = _pool(tipo).pegar(_timeout_pool())
+    if vinculada_ao_request and has_app_context():
+        # rede de segurança: se a rota esquecer o close() (exceção no meio), o teardown devolve
+        g.setdefault("_conexoes_pool", []).append((conn, conn._emprestimo))
+    return conn
+
+
+def leitura(vinculada_ao_request=True):
+    """
+    Conexão SÓ LEITURA do pool (listagens, downloads, GETs em geral).
+    Em WAL nunca espera commit de quem escreve. db.close() devolve para o pool.
+    vinculada_ao_request=False: para quem usa a conexão depois do request (stream de BLOB).
+    """
+    return _emprestar("leitura", vinculada_ao_request)
+
+
+def escrita():
+    """
+    Conexão de escrita do pool pequeno (status, finalizar, novas solicitações...).
+    db.close() devolve para o pool (transação aberta é desfeita).
+    """
+    return _emprestar("escrita", True)
+
+
+# =========================
+# Versões por tabela (invalidação de cache entre processos)
+# =========================
+# PRAGMA data_version é POR CONEXÃO (só muda com commit de outra conexão e cada conexão do pool
+# tem o seu contador), então não serve de chave de cache compartilhada entre requests/workers.
+# O que serve: um contador por tabela, no próprio banco, incrementado por trigger.
+TABELA_VERSOES = "dados_versao"
+
+# carimbos de tempo preenchidos por trigger (migração 0008): o UPDATE que só mexe neles é eco
+# de outra gravação (INSERT ou mudança de status), não uma mudança nova
+COLUNAS_CARIMBO = ("created_at", "updated_at")
+
+# onde o anexo está guardado (BLOB ou referência ao store): só muda quando
+# database/migration_blobs_to_store.py move o BLOB, e o conteúdo continua o mesmo
+COLUNAS_ARMAZENAMENTO = ("arquivo", "arquivo_sha256", "arquivo_tamanho")
+
+
+def evento_update(conn, tabela):
+    """
+    "UPDATE OF <colunas menos carimbos e armazenamento>" para trigger AFTER UPDATE que não deve
+    disparar com o UPDATE de updated_at/created_at feito pelos triggers da 0008 nem com a troca
+    BLOB -> store (uma linha no log por anexo movido).
+    Coluna nova na tabela = recriar o trigger (as funções criar_* são idempotentes).
+    """
+    ignorar = COLUNAS_CARIMBO + COLUNAS_ARMAZENAMENTO
+    cols = [r[1] for r in conn.execute(f'PRAGMA table_info("{tabela}")').fetchall()]
+    dados = [c for c in cols if c not in ignorar]
+    if len(dados) == len(cols):
+        return "UPDATE"
+    return "UPDATE OF " + ", ".join(f'"{c}"' for c in dados)
+
+
+def criar_versoes(conn, tabelas):
+    """
+    Cria (se faltar) a tabela de versões e (re)cria os triggers AFTER INSERT/UPDATE/DELETE
+    de cada tabela de `tabelas` que existe. Idempotente (para usar em migrações).
+    """
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABELA_VERSOES} (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+
+    for tabela in tabelas:
+        if not conn.execute(f'PRAGMA table_info("{tabela}")').fetchall():
+            continue
+
+        conn.execute(f"INSERT OR IGNORE INTO {TABELA_VERSOES} (tabela, versao) VALUES (?, 0)", (tabela,))
+
+        for sufixo, evento in (("ai", "INSERT"), ("au", evento_update(conn, tabela)), ("ad", "DELETE")):
+            conn.execute(f'DROP TRIGGER IF EXISTS "trg_{tabela}_versao_{sufixo}"')
+            conn.execute(f"""
+                CREATE TRIGGER "trg_{tabela}_versao_{sufixo}" AFTER {evento} ON "{tabela}" BEGIN
+                    UPDATE {TABELA_VERSOES} SET versao = versao + 1 WHERE tabela = '{tabela}';
+                END
+            """)
+
+
+def tocar(conn, tabela):
+    """Incrementa a versão de `tabela` à mão (mudança fora do banco). Não faz commit."""
+    conn.execute(
+        f"""
+        INSERT INTO {TABELA_VERSOES} (tabela, versao) VALUES (?, 1)
+        ON CONFLICT(tabela) DO UPDATE SET versao = versao + 1
+        """,
+        (tabela,),
+    )
+
+
+def versoes(conn, tabelas=None):
+    """
+    Foto das versões em 1 query: tupla ordenada de (tabela, versao).
+    tabelas=None: todas. Banco sem a tabela de versões (migração pendente) = None.
+    """
+    sql = f"SELECT tabela, versao FROM {TABELA_VERSOES}"
+    params = ()
+    if tabelas is not None:
+        params = tuple(sorted(set(tabelas)))
+        sql += f" WHERE tabela IN ({','.join('?' * len(params))})"
+    try:
+        rows = conn.execute(sql + " ORDER BY tabela", params).fetchall()
+    except sqlite3.OperationalError:
+        return None
+    return tuple((r[0], r[1]) for r in rows)
+
+
+class CacheVersionado:
+    """
+    Cache por processo (LRU) de qualquer resultado derivado do banco.
+    Cada entrada guarda as versões das tabelas de que depende; obter() confere com 1 query
+    e só chama gerar() se algum worker (este ou outro processo) gravou nelas desde então.
+    """
+
+    def __init__(self, maximo=256):
+        self.maximo = maximo
+        self._lock = threading.Lock()
+        self._itens = OrderedDict()  # chave -> (versoes, criado_em, valor)
+
+    def obter(self, conn, chave, gerar, tabelas=None, ttl=None):
+        """
+        Valor de `chave` (tupla; o caminho do banco entra sozinho na chave).
+        As versões são lidas ANTES de gerar(): o que mudar durante a geração invalida no próximo uso.
+        ttl (segundos): validade máxima, para o que muda fora do banco.
+        """
+        valor, marca = self.consultar(conn, chave, tabelas, ttl)
+        if valor is not None:
+            return valor
+        valor = gerar()
+        self.guardar(marca, valor)
+        return valor
+
+    def consultar(self, conn, chave, tabelas=None, ttl=None):
+        """
+        Metade "leitura" do obter(), para quem gera o valor aos poucos (stream).
+        Retorna (valor, marca): valor None = não tem/velho; guardar(marca, valor) depois de gerar.
+        """
+        atual = versoes(conn, tabelas)
+        if atual is None:
+            return None, None
+
+        if has_app_context():
+            chave = (db_path(),) + tuple(chave)
+        agora = time.monotonic()
+
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None and item[0] == atual and (ttl is None or agora - item[1] < ttl):
+                self._itens.move_to_end(chave)
+                return item[2], None
+        return None, (chave, atual, agora)
+
+    def guardar(self, marca, valor):
+        if marca is None:
+            return
+        chave, atual, agora = marca
+        with self._lock:
+            self._itens[chave] = (atual, agora, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > max(1, self.maximo):
+                self._itens.popitem(last=False)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
 
 def get_db():
+    """
+    Conexão do request (g.db, devolvida no teardown): GET/HEAD usam leitura(), os outros
+    métodos escrita() (o pool de escrita é pequeno: não gasta vaga com tela que só lê).
+    """
     if "db" not in g:
-        g.db = sqlite3.connect(str(current_app.config["DATABASE"]))
-        g.db.row_factory = sqlite3.Row
+        so_le = has_request_context() and request.method in ("GET", "HEAD")
+        g.db = leitura() if so_le else escrita()
     return g.db
 
 def close_db(e=None):
@@ -12,5 +348,10 @@ def close_db(e=None):
     if db is not None:
         db.close()
 
+    for conn, emprestimo in g.pop("_conexoes_pool", []):
+        # já devolvida (ou emprestada de novo a outro request) = não mexe
+        if conn._em_uso and conn._emprestimo == emprestimo:
+            conn.close()
+
 def init_db(app):
     app.teardown_appcontext(close_db)
@@ -0,0 +1,186 @@
+# backend/documentos.py
+"""
+Documentos por protocolo (pasta base/<protocolo>/ ou tabela solicitacao_docs).
+
+As telas de listagem resolvem os documentos de TODOS os protocolos da página de uma vez:
+- com solicitacao_docs: 1 query "WHERE protocolo IN (...)" (em blocos);
+- sem a tabela: 1 os.scandir por pasta base + 1 por pasta de protocolo que existe
+  (em stream, as pastas base são varridas uma vez por request: pastas_de_protocolo()).
+"""
+import os
+
+from flask import current_app
+
+# limite seguro de parâmetros por query (SQLITE_MAX_VARIABLE_NUMBER antigo = 999)
+_IN_CHUNK = 500
+
+_DEFAULT_BASES = [
+    "database/Documentos_Admissional",
+    "database/Documentos_Periodico",
+    "database/Documentos_Demissional",
+    "database/Documentos_Retorno",
+    "database/Documentos_Avaliacao",
+    "database/Documentos_Mudanca",
+]
+
+
+def safe_filename(name: str) -> bool:
+    if not name:
+        return False
+    if "/" in name or "\\" in name:
+        return False
+    if ".." in name:
+        return False
+    return True
+
+
+def allowed_doc(filename: str) -> bool:
+    if not filename or "." not in filename:
+        return False
+    ext = filename.rsplit(".", 1)[-1].lower()
+    allowed = {
+        "pdf", "png", "jpg", "jpeg", "webp",
+        "doc", "docx", "xls", "xlsx", "txt", "csv",
+    }
+    return ext in allowed
+
+
+def doc_base_dirs():
+    """
+    Pastas base onde podem existir diretórios por protocolo (só as que existem, sem repetição).
+    """
+    dirs = [os.path.abspath(current_app.config.get("UPLOADS_DIR", "uploads"))]
+    dirs += [os.path.abspath(d) for d in _DEFAULT_BASES]
+
+    out = []
+    seen = set()
+    for d in dirs:
+        if d and os.path.isdir(d) and d not in seen:
+            out.append(d)
+            seen.add(d)
+    return out
+
+
+def _docs_from_table(db, protocolos):
+    out = {p: [] for p in protocolos}
+    seen = {p: set() for p in protocolos}
+
+    lista = list(protocolos)
+    for i in range(0, len(lista), _IN_CHUNK):
+        bloco = lista[i:i + _IN_CHUNK]
+        marks = ",".join("?" * len(bloco))
+        rows = db.execute(
+            f"""
+            SELECT protocolo, filename, stored_name
+            FROM solicitacao_docs
+            WHERE protocolo IN ({marks})
+            ORDER BY rowid DESC
+            """,
+            bloco,
+        ).fetchall()
+
+        for d in rows:
+            protocolo = d["protocolo"]
+            stored = (d["stored_name"] or "").strip()
+            fname = (d["filename"] or "").strip() or stored
+
+            if not (safe_filename(stored) and allowed_doc(stored)):
+                continue
+
+            # dedupe por stored_name (case-insensitive)
+            key = stored.casefold()
+            if key in seen[protocolo]:
+                continue
+            seen[protocolo].add(key)
+
+            out[protocolo].append({"filename": fname, "stored_name": stored})
+
+    return out
+
+
+def pastas_de_protocolo():
+    """
+    {protocolo: [pasta, ...]} de todas as pastas base (1 os.scandir por base, na ordem de
+    doc_base_dirs()). Listagem em stream monta uma vez e usa em todos os blocos.
+    """
+    out = {}
+    for base in doc_base_dirs():
+        try:
+            with os.scandir(base) as it:
+                for e in it:
+                    if e.is_dir():
+                        out.setdefault(e.name, []).append(e.path)
+        except OSError:
+            continue
+    return out
+
+
+def _docs_from_dirs(protocolos, pastas=None):
+    out = {p: [] for p in protocolos}
+    encontrados = {p: set() for p in protocolos}  # case-insensitive
+
+    if pastas is None:
+        pastas = pastas_de_protocolo()
+
+    for protocolo in protocolos:
+        for caminho in pastas.get(protocolo, ()):
+            try:
+                with os.scandir(caminho) as it:
+                    nomes = sorted(e.name for e in it if e.is_file())
+            except OSError:
+                continue
+
+            for fname in nomes:
+                if not safe_filename(fname) or not allowed_doc(fname):
+                    continue
+
+                key = fname.casefold()
+                if key in encontrados[protocolo]:
+                    continue
+
+                encontrados[protocolo].add(key)
+                out[protocolo].append({"filename": fname, "stored_name": fname})
+
+    return out
+
+
+def get_docs_batch(db, schema, protocolos, pastas=None):
+    """
+    Documentos de vários protocolos de uma vez: {protocolo: [{"filename", "stored_name"}, ...]}.
+    Mesmas regras do antigo _get_docs (tabela tem prioridade; dedupe case-insensitive).
+    pastas: resultado de pastas_de_protocolo() já montado (senão, varre as pastas base agora).
+    """
+    wanted = {p for p in protocolos if p}
+    if not wanted:
+        return {}
+
+    if schema.has_table("solicitacao_docs"):
+        return _docs_from_table(db, wanted)
+
+    return _docs_from_dirs(wanted, pastas)
+
+
+def em_lotes_com_docs(db, schema, linhas, protocolo_de, lote=200):
+    """
+    Para listagens em stream: percorre `linhas` (iterável de (tabela, row), já na ordem final)
+    em blocos de `lote`, resolvendo os documentos de cada bloco de uma vez (sem N+1 e sem
+    carregar a lista inteira). Gera (tabela, row, docs).
+    Sem solicitacao_docs, as pastas base são varridas uma vez só (não uma vez por bloco).
+    """
+    pastas = None if schema.has_table("solicitacao_docs") else pastas_de_protocolo()
+
+    bloco = []
+    for linha in linhas:
+        bloco.append(linha)
+        if len(bloco) >= lote:
+            yield from _bloco_com_docs(db, schema, bloco, protocolo_de, pastas)
+            bloco = []
+    if bloco:
+        yield from _bloco_com_docs(db, schema, bloco, protocolo_de, pastas)
+
+
+def _bloco_com_docs(db, schema, bloco, protocolo_de, pastas):
+    protocolos = [protocolo_de(t, r) for t, r in bloco]
+    docs_map = get_docs_batch(db, schema, protocolos, pastas)
+    for (tabela, r), protocolo in zip(bloco, protocolos):
+        yield tabela, r, list(docs_map.get(protocolo, []))
@@ -0,0 +1,162 @@
+# backend/downloads.py
+"""
+Download dos anexos guardados no banco (avaliação médica / retorno ao trabalho).
+
+1. Autorização e metadados com uma query SEM o BLOB (rowid, nome, tamanho, sha256, dono).
+2. Envio: do store de anexos (sha256) ou, em linhas ainda não migradas, lendo o BLOB
+   em blocos fixos com Connection.blobopen, numa conexão própria que só fecha quando
+   a resposta termina. A memória por download fica constante, seja qual for o tamanho.
+3. Cache/Range: ETag forte (sha256 do conteúdo ou tabela-rowid-tamanho), Last-Modified,
+   If-None-Match/If-Modified-Since -> 304 e Range -> 206 (visualizador de PDF do navegador).
+"""
+import io
+import mimetypes
+import os
+import sqlite3
+from datetime import datetime
+
+from flask import abort, request, send_file
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+
+from backend.db import leitura
+from backend.anexos import CHUNK_SIZE, caminho_objeto
+from backend.schema import get_schema
+
+
+def meta_anexo(db, tabela, protocolo, extras=()):
+    """
+    Linha (sem os bytes) do anexo do protocolo: rowid, nome_arquivo, arquivo_tamanho,
+    arquivo_sha256 + colunas `extras` (ex.: cpf, user para checar o dono).
+    None se o protocolo não existe.
+    """
+    schema = get_schema(db)
+    if not schema.has_table(tabela):
+        return None
+
+    col_data = schema.col(tabela, "data")
+    data_ref = f'"{col_data}"' if col_data else "NULL"
+
+    cols = [f'"{c}"' if schema.has_column(tabela, c) else f'NULL AS "{c}"' for c in extras]
+    cols_sql = "".join(f", {c}" for c in cols)
+
+    return db.execute(
+        f"""
+        SELECT rowid AS rid, nome_arquivo, COALESCE(arquivo_tamanho, length(arquivo)) AS arquivo_tamanho,
+               arquivo_sha256, {data_ref} AS data_ref{cols_sql}
+        FROM "{tabela}"
+        WHERE protocolo = ?
+        LIMIT 1
+        """,
+        (protocolo,),
+    ).fetchone()
+
+
+class _BlobReader(io.RawIOBase):
+    """sqlite3.Blob como arquivo binário (lido em blocos pelo wrap_file); fecha a conexão junto."""
+
+    def __init__(self, conn, blob):
+        self._conn = conn
+        self._blob = blob
+        self.tamanho = len(blob)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        data = self._blob.read(min(len(b), CHUNK_SIZE))
+        n = len(data)
+        b[:n] = data
+        return n
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._blob.seek(offset, whence)
+        return self._blob.tell()
+
+    def tell(self):
+        return self._blob.tell()
+
+    def close(self):
+        if not self.closed:
+            try:
+                self._blob.close()
+            finally:
+                self._conn.close()
+        super().close()
+
+
+def _abrir_blob(tabela, rowid):
+    # a conexão vive até o fim do stream (depois do request): não fica presa ao teardown
+    conn = leitura(vinculada_ao_request=False)
+    try:
+        blob = conn.blobopen(tabela, "arquivo", rowid, readonly=True)
+    except Exception:
+        conn.close()
+        raise
+    return _BlobReader(conn, blob)
+
+
+def _to_datetime(value):
+    if not value:
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value)
+        return datetime.fromisoformat(str(value).strip())
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+def _etag_blob(tabela, row, tamanho):
+    """
+    Linha antiga (BLOB no banco): o anexo não é reescrito no lugar (novo envio = nova linha),
+    então tabela + rowid + tamanho identificam o conteúdo.
+    """
+    return f"{tabela}-{row['rid']}-{tamanho}"
+
+
+def enviar_anexo(tabela, row):
+    """Resposta de download para uma linha de meta_anexo() (já autorizada)."""
+    nome_arquivo = (row["nome_arquivo"] or "").strip()
+    tamanho = row["arquivo_tamanho"]
+    sha = row["arquivo_sha256"]
+
+    if not nome_arquivo:
+        abort(404)
+
+    mime, _ = mimetypes.guess_type(nome_arquivo)
+    mime = mime or "application/octet-stream"
+
+    path = caminho_objeto(sha) if sha else None
+    if path and os.path.isfile(path):
+        # conteúdo endereçado pelo hash: o próprio sha256 é o ETag
+        return send_file(path, mimetype=mime, as_attachment=True, download_name=nome_arquivo, etag=sha)
+
+    if not tamanho:
+        abort(404)
+
+    try:
+        reader = _abrir_blob(tabela, row["rid"])
+    except sqlite3.Error:
+        # linha apagada / BLOB virou NULL entre a autorização e o envio
+        abort(404)
+
+    resp = send_file(
+        reader,
+        mimetype=mime,
+        as_attachment=True,
+        download_name=nome_arquivo,
+        etag=_etag_blob(tabela, row, reader.tamanho),
+        last_modified=_to_datetime(row["data_ref"]),
+        conditional=False,
+    )
+    resp.content_length = reader.tamanho
+
+    # 304 / 206: o send_file só sabe o tamanho de BytesIO/caminho, então passamos aqui
+    try:
+        return resp.make_conditional(request, accept_ranges=True, complete_length=reader.tamanho)
+    except RequestedRangeNotSatisfiable:
+        reader.close()
+        raise
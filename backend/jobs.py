@@ -0,0 +1,224 @@
+# backend/jobs.py
+"""
+Fila de tarefas em segundo plano, guardada no próprio SQLite (tabela "jobs", migração 0010).
+
+- enfileirar(conn, tipo, payload): grava a tarefa na MESMA conexão/transação de quem chamou
+  (se o request der rollback, a tarefa some junto; se der commit, ela sobrevive a restart);
+- workers: JOBS_WORKERS threads por processo (0 = não sobe nenhuma), iniciadas no create_app();
+- cada worker pega uma tarefa com UM UPDATE ... RETURNING (atômico entre threads e processos);
+- erro: volta para "pendente" com espera exponencial (JOBS_BACKOFF_S * 2^(tentativa-1), com teto)
+  até max_tentativas; depois fica "falhou" com a mensagem do erro;
+- tarefa "rodando" há mais de JOBS_LEASE_S (processo morreu no meio) é pega de novo;
+- tarefas "feito" com mais de 7 dias são apagadas pelos próprios workers.
+
+Handlers: @tarefa("nome") em qualquer módulo importado pelo app; recebem o payload (dict) e
+rodam dentro de app_context(). Devem ser idempotentes (podem rodar de novo depois de um erro).
+"""
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import traceback
+
+from backend.db import connect
+
+TABELA = "jobs"
+
+_handlers = {}
+_acordar = threading.Event()
+
+_RETENCAO_FEITOS_S = 7 * 24 * 3600
+
+
+def tarefa(nome):
+    """Registra o handler de um tipo de tarefa."""
+    def decorador(fn):
+        _handlers[nome] = fn
+        return fn
+    return decorador
+
+
+def _agora():
+    return int(time.time())
+
+
+def enfileirar(conn, tipo, payload=None, atraso=0, max_tentativas=5):
+    """
+    Grava a tarefa usando `conn` (sem commit: vai junto com a transação de quem chamou).
+    Retorna o id.
+    """
+    if tipo not in _handlers:
+        raise ValueError(f"tarefa desconhecida: {tipo}")
+
+    agora = _agora()
+    cur = conn.execute(
+        f"""
+        INSERT INTO {TABELA} (tipo, payload, status, tentativas, max_tentativas,
+                              executar_em, criado_em, atualizado_em)
+        VALUES (?, ?, 'pendente', 0, ?, ?, ?, ?)
+        """,
+        (tipo, json.dumps(payload or {}, ensure_ascii=False), max_tentativas, agora + atraso, agora, agora),
+    )
+    _acordar.set()
+    return cur.lastrowid
+
+
+def status(conn, job_id):
+    """Linha da tarefa como dict (payload decodificado) ou None."""
+    r = conn.execute(
+        f"""
+        SELECT id, tipo, payload, status, tentativas, max_tentativas, executar_em,
+               erro, criado_em, atualizado_em
+        FROM {TABELA} WHERE id = ?
+        """,
+        (job_id,),
+    ).fetchone()
+    if not r:
+        return None
+    out = dict(r)
+    out["payload"] = json.loads(out["payload"] or "{}")
+    return out
+
+
+def resumo(conn):
+    """{status: quantidade} + as últimas falhas, para inspeção."""
+    contagem = {r[0]: r[1] for r in conn.execute(f"SELECT status, COUNT(*) FROM {TABELA} GROUP BY status")}
+    falhas = [
+        dict(r) for r in conn.execute(
+            f"""
+            SELECT id, tipo, tentativas, erro, atualizado_em FROM {TABELA}
+            WHERE status = 'falhou' ORDER BY atualizado_em DESC LIMIT 20
+            """
+        ).fetchall()
+    ]
+    return {"contagem": contagem, "falhas": falhas}
+
+
+# =========================
+# Worker
+# =========================
+class _Worker(threading.Thread):
+    def __init__(self, app, path, nome):
+        super().__init__(name=nome, daemon=True)
+        self.app = app
+        self.path = path
+        self.cfg = app.config
+        self.dono = f"{os.getpid()}:{nome}"
+
+    def _abrir(self):
+        with self.app.app_context():
+            return connect(self.path, isolation_level=None)
+
+    def _pegar(self, conn):
+        agora = _agora()
+        lease = self.cfg.get("JOBS_LEASE_S", 600)
+        return conn.execute(
+            f"""
+            UPDATE {TABELA}
+            SET status = 'rodando', dono = ?, tentativas = tentativas + 1, atualizado_em = ?
+            WHERE id = (
+                SELECT id FROM {TABELA}
+                WHERE (status = 'pendente' AND executar_em <= ?)
+                   OR (status = 'rodando' AND atualizado_em < ?)
+                ORDER BY executar_em, id
+                LIMIT 1
+            )
+            RETURNING id, tipo, payload, tentativas, max_tentativas
+            """,
+            (self.dono, agora, agora, agora - lease),
+        ).fetchone()
+
+    def _concluir(self, conn, job):
+        conn.execute(
+            f"UPDATE {TABELA} SET status = 'feito', erro = NULL, atualizado_em = ? WHERE id = ? AND dono = ?",
+            (_agora(), job["id"], self.dono),
+        )
+
+    def _falhar(self, conn, job, erro):
+        agora = _agora()
+        if job["tentativas"] >= job["max_tentativas"]:
+            conn.execute(
+                f"UPDATE {TABELA} SET status = 'falhou', erro = ?, atualizado_em = ? WHERE id = ? AND dono = ?",
+                (erro, agora, job["id"], self.dono),
+            )
+            return
+        base = self.cfg.get("JOBS_BACKOFF_S", 5)
+        espera = min(base * 2 ** (job["tentativas"] - 1), 3600)
+        espera += random.uniform(0, espera / 4)  # espalha retries que falharam juntos
+        conn.execute(
+            f"""
+            UPDATE {TABELA} SET status = 'pendente', erro = ?, executar_em = ?, atualizado_em = ?
+            WHERE id = ? AND dono = ?
+            """,
+            (erro, agora + int(espera), agora, job["id"], self.dono),
+        )
+
+    def _podar(self, conn):
+        conn.execute(
+            f"DELETE FROM {TABELA} WHERE status = 'feito' AND atualizado_em < ?",
+            (_agora() - _RETENCAO_FEITOS_S,),
+        )
+
+    def _executar(self, job):
+        handler = _handlers.get(job["tipo"])
+        if handler is None:
+            raise LookupError(f"sem handler para a tarefa {job['tipo']!r}")
+        with self.app.app_context():
+            handler(json.loads(job["payload"] or "{}"))
+
+    def run(self):
+        conn = None
+        voltas = 0
+        intervalo = self.cfg.get("JOBS_POLL_S", 2)
+
+        while True:
+            try:
+                if conn is None:
+                    conn = self._abrir()
+
+                job = self._pegar(conn)
+                if job is None:
+                    voltas += 1
+                    if voltas % 500 == 0:
+                        self._podar(conn)
+                    _acordar.wait(intervalo)
+                    _acordar.clear()
+                    continue
+
+                try:
+                    self._executar(job)
+                except Exception as e:
+                    self.app.logger.warning("tarefa %s (%s) falhou: %s", job["id"], job["tipo"], e)
+                    self._falhar(conn, job, "".join(traceback.format_exception_only(type(e), e)).strip())
+                else:
+                    self._concluir(conn, job)
+
+            except sqlite3.Error:
+                # banco ocupado/indisponível: espera e reabre
+                self.app.logger.exception("worker de tarefas: erro de banco")
+                if conn is not None:
+                    conn.close()
+                conn = None
+                time.sleep(intervalo)
+
+
+_iniciados = set()
+_iniciados_lock = threading.Lock()
+
+
+def iniciar(app):
+    """Sobe JOBS_WORKERS threads para o banco do app (uma vez por processo e banco)."""
+    n = app.config.get("JOBS_WORKERS", 0)
+    if n <= 0:
+        return
+
+    path = os.path.abspath(app.config["DATABASE"])
+    with _iniciados_lock:
+        if path in _iniciados:
+            return
+        _iniciados.add(path)
+
+    for i in range(n):
+        _Worker(app, path, f"jobs-{i + 1}").start()
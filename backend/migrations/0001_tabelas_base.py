@@ -0,0 +1,137 @@
+"""Tabelas base: usuários + as seis tabelas de solicitação (formato original dos create_table_*.py)."""
+
+TABELAS = [
+    """
+    CREATE TABLE IF NOT EXISTS "user" (
+      user TEXT PRIMARY KEY,
+      password TEXT,
+      type TEXT CHECK(type IN ('cliente', 'consultor', 'administrador')),
+      email TEXT,
+      name TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS solicitacoes_admissional (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        protocolo TEXT,
+        cnpj TEXT,
+        unidade TEXT,
+        empresa TEXT,
+        centro_custo TEXT,
+        codigo_rh TEXT,
+        data_preferencia TEXT,
+        local_agendar TEXT,
+        funcionario TEXT,
+        rg TEXT,
+        cpf TEXT,
+        nascimento TEXT,
+        admissao TEXT,
+        funcao TEXT,
+        setor TEXT,
+        telefone TEXT,
+        user TEXT,
+        status_final TEXT DEFAULT 'Em Aberto'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS solicitacoes_periodico (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        protocolo TEXT,
+        funcionario TEXT,
+        cpf TEXT,
+        empresa TEXT,
+        local_agendar TEXT,
+        data_preferencia TEXT,
+        telefone TEXT,
+        user TEXT,
+        status_final TEXT DEFAULT 'Em Aberto'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS solicitacoes_demissional (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        protocolo TEXT,
+        funcionario TEXT,
+        cpf TEXT,
+        empresa TEXT,
+        local_agendar TEXT,
+        data_preferencia TEXT,
+        telefone TEXT,
+        user TEXT,
+        status_final TEXT DEFAULT 'Em Aberto'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS solicitacoes_retorno_trabalho (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        protocolo TEXT,
+        funcionario TEXT,
+        cpf TEXT,
+        empresa TEXT,
+        local_agendar TEXT,
+        data_preferencia TEXT,
+        telefone TEXT,
+        user TEXT,
+
+        -- Upload (atestado médico)
+        nome_arquivo TEXT,
+        arquivo BLOB,
+
+        status_final TEXT DEFAULT 'Em Aberto'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS solicitacoes_mudanca_riscos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        protocolo TEXT,
+        funcionario TEXT,
+        cpf TEXT,
+        empresa TEXT,
+        local_agendar TEXT,
+        data_preferencia TEXT,
+        telefone TEXT,
+        user TEXT,
+
+        unidade_anterior TEXT,
+        setor_anterior TEXT,
+        cargo_anterior TEXT,
+
+        unidade_atual TEXT,
+        setor_atual TEXT,
+        cargo_atual TEXT,
+
+        status_final TEXT DEFAULT 'Em Aberto'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS solicitacoes_avaliacao_medica (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        protocolo TEXT,
+
+        funcionario TEXT,
+        cpf TEXT,
+        empresa TEXT,
+        local_agendar TEXT,
+        data_preferencia TEXT,
+        telefone TEXT,
+        user TEXT,
+
+        -- escolha do usuário: texto ou pdf
+        forma_justificativa TEXT,     -- 'texto' ou 'pdf'
+
+        -- quando for texto
+        justificativa_texto TEXT,
+
+        -- quando for pdf
+        nome_arquivo TEXT,
+        arquivo BLOB,
+
+        status_final TEXT DEFAULT 'Em Aberto'
+    )
+    """,
+]
+
+
+def up(conn):
+    for sql in TABELAS:
+        conn.execute(sql)
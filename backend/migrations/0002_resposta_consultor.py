@@ -0,0 +1,16 @@
+"""Última resposta do consultor em todas as tabelas (antigo migration_add_resposta_consultor.py)."""
+from backend.migrations import add_column
+
+TABELAS = [
+    "solicitacoes_admissional",
+    "solicitacoes_avaliacao_medica",
+    "solicitacoes_demissional",
+    "solicitacoes_mudanca_riscos",
+    "solicitacoes_periodico",
+    "solicitacoes_retorno_trabalho",
+]
+
+
+def up(conn):
+    for t in TABELAS:
+        add_column(conn, t, "resposta_consultor", "TEXT")
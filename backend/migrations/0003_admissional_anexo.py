@@ -0,0 +1,7 @@
+"""Anexo opcional do admissional (antes a rota checava se a tabela tinha essas colunas)."""
+from backend.migrations import add_column
+
+
+def up(conn):
+    add_column(conn, "solicitacoes_admissional", "nome_arquivo", "TEXT")
+    add_column(conn, "solicitacoes_admissional", "arquivo", "BLOB")
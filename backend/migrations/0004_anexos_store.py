@@ -0,0 +1,17 @@
+"""
+Referência ao store de anexos (SHA-256) + tamanho.
+Só o schema: mover os BLOBs antigos é o database/migration_blobs_to_store.py (online, em lotes).
+"""
+from backend.migrations import add_column
+
+TABELAS = [
+    "solicitacoes_admissional",
+    "solicitacoes_avaliacao_medica",
+    "solicitacoes_retorno_trabalho",
+]
+
+
+def up(conn):
+    for t in TABELAS:
+        add_column(conn, t, "arquivo_sha256", "TEXT")
+        add_column(conn, t, "arquivo_tamanho", "INTEGER")
@@ -0,0 +1,85 @@
+"""
+Índices das seis tabelas solicitacoes_* (+ solicitacao_docs, se existir).
+
+Conjunto gerenciado, por tabela:
+- ux_<tabela>_protocolo   UNIQUE (protocolo)      downloads, status, finalizar
+- idx_<tabela>_user       (user)                  /minhas-solicitacoes
+- idx_<tabela>_cpf        (cpf)                   /minhas-solicitacoes
+- idx_<tabela>_status     (status_final, <data>)  fila do consultor (sem coluna de data: o rowid já vai no fim do índice)
+
+Se já houver protocolo repetido numa tabela, o UNIQUE não é criado: a tabela ganha um
+índice comum idx_<tabela>_protocolo e os repetidos são listados.
+Os índices antigos do init_db.py (idx_solicitacoes_protocolo / idx_solicitacoes_user) saem.
+"""
+import logging
+
+from backend.migrations import colunas
+
+# filho do logger "backend" (app.logger) quando roda no create_app; no CLI cai no stderr
+log = logging.getLogger(__name__)
+
+TABELAS = [
+    "solicitacoes_admissional",
+    "solicitacoes_avaliacao_medica",
+    "solicitacoes_demissional",
+    "solicitacoes_mudanca_riscos",
+    "solicitacoes_periodico",
+    "solicitacoes_retorno_trabalho",
+]
+
+LEGACY = ["idx_solicitacoes_protocolo", "idx_solicitacoes_user"]
+
+# mesma prioridade do backend/schema.py (ALIASES["data"])
+DATA_COLS = ["criado_em", "created_at", "data_criacao", "data", "timestamp"]
+
+
+def _criar(conn, nome, tabela, cols, unique=False):
+    cols_sql = ", ".join(f'"{c}"' for c in cols)
+    unique_sql = "UNIQUE " if unique else ""
+    conn.execute(f'CREATE {unique_sql}INDEX IF NOT EXISTS "{nome}" ON "{tabela}" ({cols_sql})')
+
+
+def _indice_protocolo(conn, tabela):
+    dups = conn.execute(
+        f"""
+        SELECT protocolo, COUNT(*) FROM "{tabela}"
+        WHERE protocolo IS NOT NULL
+        GROUP BY protocolo HAVING COUNT(*) > 1
+        LIMIT 20
+        """
+    ).fetchall()
+
+    if dups:
+        log.warning(
+            "%s: protocolo repetido, índice UNIQUE não criado: %s",
+            tabela,
+            ", ".join(f"{protocolo} ({n}x)" for protocolo, n in dups),
+        )
+        _criar(conn, f"idx_{tabela}_protocolo", tabela, ["protocolo"])
+        return
+
+    _criar(conn, f"ux_{tabela}_protocolo", tabela, ["protocolo"], unique=True)
+    conn.execute(f'DROP INDEX IF EXISTS "idx_{tabela}_protocolo"')
+
+
+def up(conn):
+    for t in TABELAS:
+        cols = colunas(conn, t)
+        if not cols:
+            continue
+
+        if "protocolo" in cols:
+            _indice_protocolo(conn, t)
+        if "user" in cols:
+            _criar(conn, f"idx_{t}_user", t, ["user"])
+        if "cpf" in cols:
+            _criar(conn, f"idx_{t}_cpf", t, ["cpf"])
+        if "status_final" in cols:
+            col_data = next((c for c in DATA_COLS if c in cols), None)
+            _criar(conn, f"idx_{t}_status", t, ["status_final"] + ([col_data] if col_data else []))
+
+    if colunas(conn, "solicitacao_docs"):
+        _criar(conn, "idx_solicitacao_docs_protocolo", "solicitacao_docs", ["protocolo"])
+
+    for nome in LEGACY:
+        conn.execute(f'DROP INDEX IF EXISTS "{nome}"')
@@ -0,0 +1,6 @@
+"""Índice de busca textual (FTS5) da fila do consultor + triggers (backend/busca.py)."""
+from backend.busca import criar_indice
+
+
+def up(conn):
+    criar_indice(conn)
@@ -0,0 +1,10 @@
+"""Sequência diária dos protocolos (backend/protocolo.py): um contador por dia, compartilhado pelas seis tabelas."""
+
+
+def up(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS protocolo_sequencia (
+            dia TEXT PRIMARY KEY,
+            ultimo INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
@@ -0,0 +1,79 @@
+"""
+created_at / updated_at (epoch, INTEGER) nas seis tabelas solicitacoes_*.
+
+- Triggers preenchem no INSERT e atualizam updated_at quando muda status ou resposta do consultor
+  (quem gravar updated_at explicitamente no UPDATE não é sobrescrito).
+- Linhas que já existiam recebem o horário da migração (a ordem entre elas segue o rowid).
+- Índices: idx_<tabela>_created, idx_<tabela>_updated, e os de status/user/cpf passam a
+  terminar em created_at (fila e /minhas-solicitacoes ordenam pelo índice).
+"""
+from backend.migrations import add_column, colunas
+
+TABELAS = [
+    "solicitacoes_admissional",
+    "solicitacoes_avaliacao_medica",
+    "solicitacoes_demissional",
+    "solicitacoes_mudanca_riscos",
+    "solicitacoes_periodico",
+    "solicitacoes_retorno_trabalho",
+]
+
+# colunas cuja mudança conta como "atualização" da solicitação
+COLS_ATUALIZACAO = ["status_final", "resposta_consultor"]
+
+_AGORA = "CAST(strftime('%s', 'now') AS INTEGER)"
+
+
+def _indice(conn, nome, tabela, cols):
+    # recria: o índice antigo com o mesmo nome pode ter outras colunas (0005)
+    conn.execute(f'DROP INDEX IF EXISTS "{nome}"')
+    cols_sql = ", ".join(f'"{c}"' for c in cols)
+    conn.execute(f'CREATE INDEX "{nome}" ON "{tabela}" ({cols_sql})')
+
+
+def up(conn):
+    for t in TABELAS:
+        if not colunas(conn, t):
+            continue
+
+        add_column(conn, t, "created_at", "INTEGER")
+        add_column(conn, t, "updated_at", "INTEGER")
+        conn.execute(
+            f'UPDATE "{t}" SET created_at = COALESCE(created_at, {_AGORA}), '
+            f"updated_at = COALESCE(updated_at, created_at, {_AGORA}) "
+            "WHERE created_at IS NULL OR updated_at IS NULL"
+        )
+
+        conn.execute(f'DROP TRIGGER IF EXISTS "trg_{t}_ts_ai"')
+        conn.execute(f"""
+            CREATE TRIGGER "trg_{t}_ts_ai" AFTER INSERT ON "{t}"
+            WHEN NEW.created_at IS NULL OR NEW.updated_at IS NULL
+            BEGIN
+                UPDATE "{t}"
+                SET created_at = COALESCE(NEW.created_at, {_AGORA}),
+                    updated_at = COALESCE(NEW.updated_at, NEW.created_at, {_AGORA})
+                WHERE rowid = NEW.rowid;
+            END
+        """)
+
+        cols = colunas(conn, t)
+        atualizacao = [c for c in COLS_ATUALIZACAO if c in cols]
+        conn.execute(f'DROP TRIGGER IF EXISTS "trg_{t}_ts_au"')
+        if atualizacao:
+            conn.execute(f"""
+                CREATE TRIGGER "trg_{t}_ts_au"
+                AFTER UPDATE OF {", ".join(f'"{c}"' for c in atualizacao)} ON "{t}"
+                WHEN NEW.updated_at IS OLD.updated_at
+                BEGIN
+                    UPDATE "{t}" SET updated_at = {_AGORA} WHERE rowid = NEW.rowid;
+                END
+            """)
+
+        _indice(conn, f"idx_{t}_created", t, ["created_at"])
+        _indice(conn, f"idx_{t}_updated", t, ["updated_at"])
+        if "status_final" in cols:
+            _indice(conn, f"idx_{t}_status", t, ["status_final", "created_at"])
+        if "user" in cols:
+            _indice(conn, f"idx_{t}_user", t, ["user", "created_at"])
+        if "cpf" in cols:
+            _indice(conn, f"idx_{t}_cpf", t, ["cpf", "created_at"])
@@ -0,0 +1,6 @@
+"""Log de alterações das solicitações + triggers (backend/alteracoes.py)."""
+from backend.alteracoes import criar_log
+
+
+def up(conn):
+    criar_log(conn)
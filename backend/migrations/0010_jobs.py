@@ -0,0 +1,22 @@
+"""Fila de tarefas em segundo plano (backend/jobs.py)."""
+
+
+def up(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY,
+            tipo TEXT NOT NULL,
+            payload TEXT NOT NULL DEFAULT '{}',
+            status TEXT NOT NULL DEFAULT 'pendente',
+            tentativas INTEGER NOT NULL DEFAULT 0,
+            max_tentativas INTEGER NOT NULL DEFAULT 5,
+            executar_em INTEGER NOT NULL,
+            dono TEXT,
+            erro TEXT,
+            criado_em INTEGER NOT NULL,
+            atualizado_em INTEGER NOT NULL
+        )
+    """)
+    # worker procura "pendente com executar_em <= agora" e "rodando há muito tempo"
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_fila ON jobs (status, executar_em)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_rodando ON jobs (status, atualizado_em)")
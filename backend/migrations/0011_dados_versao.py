@@ -0,0 +1,6 @@
+"""Versões por tabela para o cache das telas de listagem (backend/cache_paginas.py)."""
+from backend.cache_paginas import criar_versoes
+
+
+def up(conn):
+    criar_versoes(conn)
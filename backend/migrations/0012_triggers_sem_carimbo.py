@@ -0,0 +1,15 @@
+"""
+Triggers do log de alterações (0009) e das versões (0011) recriados como AFTER UPDATE OF
+<colunas menos created_at/updated_at>.
+
+O trigger de updated_at da 0008 faz um segundo UPDATE na linha; antes ele disparava de novo o
+log e a versão: uma mudança de status virava 2 linhas no log (eventos repetidos no SSE e no
+delta) e +2 na versão.
+"""
+from backend.alteracoes import criar_log
+from backend.cache_paginas import criar_versoes
+
+
+def up(conn):
+    criar_log(conn)
+    criar_versoes(conn)
@@ -0,0 +1,14 @@
+"""
+Triggers do log de alterações (0009) e das versões (0011) recriados sem as colunas de
+armazenamento do anexo (arquivo, arquivo_sha256, arquivo_tamanho) no UPDATE OF.
+
+database/migration_blobs_to_store.py troca o BLOB pela referência ao store linha a linha;
+antes cada troca virava uma alteração no log (e os painéis redesenhavam todos os cards).
+"""
+from backend.alteracoes import criar_log
+from backend.cache_paginas import criar_versoes
+
+
+def up(conn):
+    criar_log(conn)
+    criar_versoes(conn)
@@ -0,0 +1,106 @@
+# backend/migrations/__init__.py
+"""
+Migrações versionadas do Users.db.
+
+Cada arquivo NNNN_nome.py desta pasta tem uma função up(conn) e roda UMA vez por banco;
+o que já foi aplicado fica na tabela schema_migrations (versao, nome, aplicada_em).
+Cada migração roda na sua própria transação (BEGIN IMMEDIATE) e confere de novo a versão
+dentro dela, então vários processos subindo juntos não aplicam nada duas vezes.
+
+- CLI: python database/migrate.py --db database/Users.db
+- App: create_app() chama aplicar() na subida (AUTO_MIGRATE), então as rotas podem contar
+  com o schema mais novo sem sondar colunas a cada request.
+"""
+import importlib
+import pkgutil
+import sqlite3
+from datetime import datetime
+
+_TABELA = "schema_migrations"
+
+
+# =========================
+# Helpers para as migrações
+# =========================
+def colunas(conn, tabela):
+    return [r[1] for r in conn.execute(f'PRAGMA table_info("{tabela}")').fetchall()]
+
+
+def add_column(conn, tabela, coluna, tipo):
+    """ALTER TABLE ... ADD COLUMN só se a tabela existe e a coluna ainda não."""
+    cols = colunas(conn, tabela)
+    if cols and coluna not in cols:
+        conn.execute(f'ALTER TABLE "{tabela}" ADD COLUMN "{coluna}" {tipo}')
+
+
+# =========================
+# Runner
+# =========================
+def migracoes():
+    """[(versao, nome, modulo), ...] em ordem de versão."""
+    out = []
+    for info in pkgutil.iter_modules(__path__):
+        numero, _, nome = info.name.partition("_")
+        if not numero.isdigit():
+            continue
+        modulo = importlib.import_module(f"{__name__}.{info.name}")
+        out.append((int(numero), nome, modulo))
+    out.sort(key=lambda m: m[0])
+    return out
+
+
+def _garantir_tabela(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {_TABELA} (
+            versao INTEGER PRIMARY KEY,
+            nome TEXT NOT NULL,
+            aplicada_em TEXT NOT NULL
+        )
+    """)
+
+
+def aplicadas(conn):
+    _garantir_tabela(conn)
+    return {r[0] for r in conn.execute(f"SELECT versao FROM {_TABELA}").fetchall()}
+
+
+def pendentes(conn):
+    feitas = aplicadas(conn)
+    return [(v, n) for v, n, _m in migracoes() if v not in feitas]
+
+
+def aplicar(db_path, verbose=False):
+    """Leva o banco até a última versão. Retorna [(versao, nome), ...] aplicadas agora."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    feitas_agora = []
+    try:
+        conn.execute("PRAGMA busy_timeout = 10000")
+        _garantir_tabela(conn)
+
+        for versao, nome, modulo in migracoes():
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                ja = conn.execute(
+                    f"SELECT 1 FROM {_TABELA} WHERE versao = ?", (versao,)
+                ).fetchone()
+                if ja:
+                    conn.execute("ROLLBACK")
+                    continue
+
+                modulo.up(conn)
+                conn.execute(
+                    f"INSERT INTO {_TABELA} (versao, nome, aplicada_em) VALUES (?, ?, ?)",
+                    (versao, nome, datetime.now().isoformat(timespec="seconds")),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+            feitas_agora.append((versao, nome))
+            if verbose:
+                print(f"APLICADA: {versao:04d} {nome}")
+    finally:
+        conn.close()
+
+    return feitas_agora
@@ -0,0 +1,224 @@
+# backend/minificar.py
+"""
+Minificação conservadora de CSS e JS para o build dos estáticos (backend/assets.py).
+
+Sem dependência externa: tira comentários e espaço sobrando, nunca mexe no conteúdo de
+strings / template literals / regex. No JS as quebras de linha que podem encerrar um comando
+continuam lá (ASI), então o resultado se comporta igual ao original.
+"""
+
+# =========================
+# CSS
+# =========================
+# espaço antes/depois destes caracteres nunca muda o significado
+_CSS_COLA = set("{};,>")
+
+
+def _fim_string(texto, i):
+    """Índice logo depois da string que começa em texto[i] (aspas simples ou duplas)."""
+    aspas = texto[i]
+    j = i + 1
+    n = len(texto)
+    while j < n and texto[j] != aspas:
+        if texto[j] == "\\":
+            j += 1
+        j += 1
+    return min(j + 1, n)
+
+
+def css(texto):
+    out = []
+    espaco = False
+    i = 0
+    n = len(texto)
+
+    def anterior():
+        return out[-1][-1] if out else ""
+
+    while i < n:
+        ch = texto[i]
+
+        if texto.startswith("/*", i):
+            fim = texto.find("*/", i + 2)
+            i = n if fim < 0 else fim + 2
+            espaco = True
+            continue
+
+        if ch.isspace():
+            espaco = True
+            i += 1
+            continue
+
+        if espaco:
+            espaco = False
+            ant = anterior()
+            if ant and ant not in _CSS_COLA and ant != ":" and ch not in _CSS_COLA:
+                out.append(" ")
+
+        if ch in "\"'":
+            fim = _fim_string(texto, i)
+            out.append(texto[i:fim])
+            i = fim
+            continue
+
+        out.append(ch)
+        i += 1
+
+    return "".join(out).replace(";}", "}")
+
+
+# =========================
+# JS
+# =========================
+# depois destes, "/" começa uma regex (não é divisão)
+_JS_ANTES_DE_REGEX = set("(,=:[!&|?{};+-*%<>~^")
+_JS_PALAVRAS_REGEX = {
+    "return", "typeof", "case", "do", "else", "in", "of", "new", "delete",
+    "void", "throw", "instanceof", "yield", "await",
+}
+# quebra de linha logo depois destes (ou logo antes dos outros) nunca encerra um comando: pode sair
+_JS_QUEBRA_DISPENSAVEL = set("{;,([=:&|?")
+_JS_QUEBRA_DISPENSAVEL_ANTES = set(".,)]}")
+
+
+def _eh_ident(ch):
+    return ch.isalnum() or ch in "_$" or ord(ch) > 127
+
+
+def _fim_template(texto, i):
+    """Índice logo depois do template literal que começa em texto[i] (com ${...} aninhado)."""
+    j = i + 1
+    n = len(texto)
+    while j < n:
+        ch = texto[j]
+        if ch == "\\":
+            j += 2
+            continue
+        if ch == "`":
+            return j + 1
+        if texto.startswith("${", j):
+            j += 2
+            nivel = 1
+            while j < n and nivel:
+                c = texto[j]
+                if c in "\"'":
+                    j = _fim_string(texto, j)
+                    continue
+                if c == "`":
+                    j = _fim_template(texto, j)
+                    continue
+                if c == "{":
+                    nivel += 1
+                elif c == "}":
+                    nivel -= 1
+                j += 1
+            continue
+        j += 1
+    return n
+
+
+def _fim_regex(texto, i):
+    """Índice logo depois da regex literal que começa em texto[i] (sem as flags)."""
+    j = i + 1
+    n = len(texto)
+    classe = False
+    while j < n:
+        ch = texto[j]
+        if ch == "\\":
+            j += 2
+            continue
+        if ch == "\n":
+            break
+        if classe:
+            if ch == "]":
+                classe = False
+        elif ch == "[":
+            classe = True
+        elif ch == "/":
+            return j + 1
+        j += 1
+    return j
+
+
+def js(texto):
+    out = []
+    espaco = None  # None | " " | "\n"
+    ultimo = ""    # último caractere significativo emitido
+    palavra = ""   # última palavra emitida (para return /re/ etc.)
+    i = 0
+    n = len(texto)
+
+    def emitir(s):
+        nonlocal ultimo
+        out.append(s)
+        ultimo = s[-1]
+
+    while i < n:
+        ch = texto[i]
+
+        if texto.startswith("//", i):
+            fim = texto.find("\n", i)
+            i = n if fim < 0 else fim
+            continue
+
+        if texto.startswith("/*", i):
+            fim = texto.find("*/", i + 2)
+            bloco = texto[i:n if fim < 0 else fim + 2]
+            i = n if fim < 0 else fim + 2
+            if "\n" in bloco:
+                espaco = "\n"
+            elif espaco is None:
+                espaco = " "
+            continue
+
+        if ch.isspace():
+            if ch == "\n":
+                espaco = "\n"
+            elif espaco is None:
+                espaco = " "
+            i += 1
+            continue
+
+        if espaco is not None and ultimo:
+            if espaco == "\n":
+                if ultimo not in _JS_QUEBRA_DISPENSAVEL and ch not in _JS_QUEBRA_DISPENSAVEL_ANTES:
+                    emitir("\n")
+            elif (_eh_ident(ultimo) and _eh_ident(ch)) or (ultimo in "+-/" and ch in "+-/"):
+                emitir(" ")
+        espaco = None
+
+        if ch in "\"'":
+            fim = _fim_string(texto, i)
+            emitir(texto[i:fim])
+            palavra = ""
+            i = fim
+            continue
+
+        if ch == "`":
+            fim = _fim_template(texto, i)
+            emitir(texto[i:fim])
+            palavra = ""
+            i = fim
+            continue
+
+        if ch == "/" and (not ultimo or ultimo in _JS_ANTES_DE_REGEX or palavra in _JS_PALAVRAS_REGEX):
+            fim = _fim_regex(texto, i)
+            emitir(texto[i:fim])
+            palavra = ""
+            i = fim
+            continue
+
+        if _eh_ident(ch):
+            j = i
+            while j < n and _eh_ident(texto[j]):
+                j += 1
+            palavra = texto[i:j]
+            emitir(palavra)
+            i = j
+            continue
+
+        palavra = ""
+        emitir(ch)
+        i += 1
+
+    return "".join(out).strip() + "\n"
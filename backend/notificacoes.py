@@ -0,0 +1,87 @@
+# backend/notificacoes.py
+"""
+Fan-out das alterações para as conexões SSE (/api/eventos), entre processos.
+
+O próprio log solicitacoes_alteracoes (backend/alteracoes.py) é o canal: qualquer worker que
+gravar numa solicitação gera uma linha nele. Em cada processo, UM vigia (thread) olha o banco:
+- PRAGMA data_version só muda quando outra conexão faz commit -> checagem barata a cada INTERVALO;
+- mudou: lê MAX(seq) do log e acorda as conexões SSE esperando (threading.Condition).
+Cada conexão SSE então lê do log só o que passou do seu cursor (com o filtro dela).
+"""
+import sqlite3
+import threading
+import time
+
+from flask import current_app
+
+from backend import alteracoes
+from backend.db import connect, db_path
+
+INTERVALO = 0.5  # segundos entre checagens do vigia
+
+
+class _Vigia:
+    def __init__(self, abrir):
+        self._abrir = abrir
+        self._cond = threading.Condition()
+        self._seq = None
+        thread = threading.Thread(target=self._rodar, name="vigia-alteracoes", daemon=True)
+        thread.start()
+
+    def _rodar(self):
+        conn = None
+        versao = None
+        while True:
+            try:
+                if conn is None:
+                    conn = self._abrir()
+                v = conn.execute("PRAGMA data_version").fetchone()[0]
+                if v != versao or self._seq is None:
+                    versao = v
+                    seq = alteracoes.ultimo_seq(conn)
+                    with self._cond:
+                        if seq != self._seq:
+                            self._seq = seq
+                            self._cond.notify_all()
+            except sqlite3.Error:
+                # banco trocado/indisponível: reabre na próxima volta
+                if conn is not None:
+                    conn.close()
+                conn = None
+                versao = None
+            time.sleep(INTERVALO)
+
+    def esperar(self, depois_de, timeout):
+        """
+        Bloqueia até o log passar de `depois_de` (ou timeout). Retorna o último seq conhecido.
+        Cursor atrás do log volta na hora (desde() alcança); cursor à frente (log de outro
+        banco, navegador antigo) só volta no timeout, sem girar em falso.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq is not None and self._seq > depois_de, timeout)
+            return self._seq
+
+
+_vigias = {}
+_vigias_lock = threading.Lock()
+
+
+def vigia():
+    """Vigia do banco atual (um por processo e caminho; sobe no primeiro uso)."""
+    app = current_app._get_current_object()
+    path = db_path()
+
+    v = _vigias.get(path)
+    if v is not None:
+        return v
+
+    with _vigias_lock:
+        v = _vigias.get(path)
+        if v is None:
+            def abrir():
+                with app.app_context():
+                    return connect(path, somente_leitura=True, check_same_thread=False)
+
+            v = _Vigia(abrir)
+            _vigias[path] = v
+    return v
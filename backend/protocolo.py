@@ -0,0 +1,41 @@
+# backend/protocolo.py
+"""
+Protocolo das solicitações: VENDRAME<AAAAMMDD><sequência do dia, 6 dígitos>SP.
+
+- Único nas seis tabelas e entre processos: a sequência do dia fica no banco
+  (tabela protocolo_sequencia, migração 0007) e sobe num UPSERT sob o lock de escrita.
+- Largura fixa com a data na frente: a ordem alfabética do protocolo é a ordem de criação,
+  então ORDER BY protocolo / WHERE protocolo > ? andam direto no índice ux_<tabela>_protocolo.
+- Gerado dentro da transação do INSERT da solicitação: se ela não for gravada (rollback),
+  o número volta para a sequência.
+
+Protocolos antigos (VENDRAME + 10 dígitos aleatórios + SP) continuam válidos, só não seguem a ordem.
+"""
+from datetime import datetime
+
+PREFIXO = "VENDRAME"
+SUFIXO = "SP"
+_DIGITOS_SEQ = 6
+_SEQ_MAX = 10 ** _DIGITOS_SEQ - 1
+
+
+def gerar(conn, agora=None):
+    """
+    Próximo protocolo. Roda na transação aberta em `conn` (conexão de escrita) e NÃO faz
+    commit: chamar depois de validar o envio, junto do INSERT da solicitação.
+    """
+    dia = (agora or datetime.now()).strftime("%Y%m%d")
+    seq = conn.execute(
+        """
+        INSERT INTO protocolo_sequencia (dia, ultimo) VALUES (?, 1)
+        ON CONFLICT(dia) DO UPDATE SET ultimo = ultimo + 1
+        RETURNING ultimo
+        """,
+        (dia,),
+    ).fetchall()[0][0]
+
+    if seq > _SEQ_MAX:
+        # passar da largura quebraria a ordem alfabética
+        raise RuntimeError(f"sequência de protocolos do dia {dia} esgotada")
+    return f"{PREFIXO}{dia}{seq:0{_DIGITOS_SEQ}d}{SUFIXO}"
+
@@ -0,0 +1,47 @@
+# backend/routes/assets.py
+import mimetypes
+import os
+
+from flask import Blueprint, abort, request, send_from_directory
+from werkzeug.security import safe_join
+
+from backend.assets import dist_dir
+
+assets_bp = Blueprint("assets", __name__)
+
+# nome com hash = conteúdo fixo: o navegador pode guardar por 1 ano sem revalidar
+_UM_ANO = 365 * 24 * 3600
+_CACHE_CONTROL = f"public, max-age={_UM_ANO}, immutable"
+
+# (extensão da variante, Content-Encoding) em ordem de preferência
+_VARIANTES = [(".br", "br"), (".gz", "gzip")]
+
+
+def _aceita(encoding):
+    aceitos = request.accept_encodings
+    return aceitos[encoding] > 0
+
+
+@assets_bp.route("/dist/<path:nome>", methods=["GET"])
+def arquivo(nome):
+    base = dist_dir()
+    if nome.endswith((".gz", ".br", ".tmp")) or os.path.basename(nome) == "manifest.json":
+        abort(404)
+    caminho = safe_join(base, nome)
+    if caminho is None or not os.path.isfile(caminho):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(nome)[0] or "application/octet-stream"
+
+    servido, encoding = nome, None
+    for ext, enc in _VARIANTES:
+        if _aceita(enc) and os.path.isfile(caminho + ext):
+            servido, encoding = nome + ext, enc
+            break
+
+    resp = send_from_directory(base, servido, mimetype=mimetype, max_age=_UM_ANO)
+    resp.headers["Cache-Control"] = _CACHE_CONTROL
+    resp.headers["Vary"] = "Accept-Encoding"
+    if encoding:
+        resp.headers["Content-Encoding"] = encoding
+    return resp
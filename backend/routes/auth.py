@@ -1,5 +1,5 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, current_app
-from backend.db import get_db
+from backend.db import get_db, leitura
 from datetime import timedelta
 
 auth_bp = Blueprint("auth", __name__)
@@ -12,11 +12,13 @@ def login():
         username = (request.form.get("username") or "").strip()
         password = (request.form.get("password") or "").strip()
 
-        db = get_db()
+        # POST que só lê: conexão do pool de leitura
+        db = leitura()
         user = db.execute(
             'SELECT user, password, type, name, email FROM "user" WHERE user = ?',
             (username,)
         ).fetchone()
+        db.close()
 
         if not user or (user["password"] or "") != password:
             erro = "Usuário ou senha não existem."
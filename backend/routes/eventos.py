@@ -0,0 +1,142 @@
+# backend/routes/eventos.py
+import json
+import time
+from flask import Blueprint, Response, jsonify, request, session, stream_with_context
+
+from backend import alteracoes
+from backend.db import leitura
+from backend.notificacoes import vigia
+from backend.schema import get_schema
+
+eventos_bp = Blueprint("eventos", __name__)
+
+_HEARTBEAT = 15        # segundos sem evento -> comentário ": ping" (mantém proxies abertos)
+_DURACAO_MAX = 300     # fecha o stream depois disso; o EventSource reconecta com Last-Event-ID
+_LOTE = 200
+
+
+def _is_logged():
+    return session.get("user") is not None
+
+
+def _tipo():
+    return (session.get("type") or "").strip().lower()
+
+
+def _sse(evento, dados, cursor=None):
+    linhas = []
+    if cursor:
+        linhas.append(f"id: {cursor}")
+    linhas.append(f"event: {evento}")
+    linhas.append("data: " + json.dumps(dados, ensure_ascii=False, separators=(",", ":")))
+    return "\n".join(linhas) + "\n\n"
+
+
+def _payloads(db, mudancas):
+    """Status e resposta atuais das solicitações alteradas (1 query por tabela)."""
+    schema = get_schema(db)
+
+    por_tabela = {}
+    for m in mudancas:
+        if m["op"] != "D" and m["tabela"] in schema.solicitacao_tables():
+            por_tabela.setdefault(m["tabela"], []).append(m["rid"])
+
+    atuais = {}
+    for tabela, rids in por_tabela.items():
+        col_status = schema.col(tabela, "status")
+        status_sql = f'"{col_status}"' if col_status else "NULL"
+        resposta_sql = '"resposta_consultor"' if schema.has_column(tabela, "resposta_consultor") else "NULL"
+        marks = ",".join("?" * len(rids))
+        for r in db.execute(
+            f'SELECT rowid AS rid, {status_sql} AS status, {resposta_sql} AS resposta '
+            f'FROM "{tabela}" WHERE rowid IN ({marks})',
+            rids,
+        ).fetchall():
+            atuais[(tabela, r["rid"])] = r
+
+    out = []
+    for m in mudancas:
+        atual = atuais.get((m["tabela"], m["rid"]))
+        if m["op"] != "D" and atual is None:
+            continue  # apagada depois: o "D" vem no próximo lote
+        out.append({
+            "op": m["op"],
+            "origem": m["tabela"],
+            "rid": m["rid"],
+            "protocolo": m["protocolo"],
+            "status": ((atual["status"] or "").strip() or "Em Aberto") if atual else None,
+            "resposta_consultor": atual["resposta"] if atual else None,
+        })
+    return out
+
+
+# =========================
+# SSE: alterações de status/resposta
+# =========================
+@eventos_bp.route("/api/eventos", methods=["GET"])
+def api_eventos():
+    """
+    Stream SSE (text/event-stream) das alterações nas solicitações:
+    - consultor: todas; cliente: só as do próprio login (coluna user);
+    - evento "alteracao" por solicitação, "recarregar" se o cursor ficou velho demais;
+    - id de cada evento = cursor do log; na reconexão o navegador manda Last-Event-ID.
+    Cada conexão ocupa uma thread do servidor: rodar com workers que tenham threads (gthread).
+    """
+    if not _is_logged():
+        return jsonify({"ok": False, "error": "not_logged"}), 401
+
+    tipo = _tipo()
+    if tipo == "consultor":
+        usuario = None
+    elif tipo == "cliente":
+        usuario = (session.get("user") or "").strip()
+    else:
+        return jsonify({"ok": False, "error": "forbidden"}), 403
+
+    db = leitura()
+    try:
+        if not get_schema(db).has_table(alteracoes.TABELA):
+            return jsonify({"ok": False, "error": "change_log_missing"}), 503
+        seq = alteracoes.decode_cursor(
+            request.headers.get("Last-Event-ID") or (request.args.get("desde") or "").strip()
+        )
+        if seq is None:
+            seq = alteracoes.ultimo_seq(db)
+    finally:
+        db.close()
+
+    v = vigia()
+
+    def gerar():
+        nonlocal seq
+        fim = time.monotonic() + _DURACAO_MAX
+        yield "retry: 3000\n\n"
+
+        while time.monotonic() < fim:
+            ultimo = v.esperar(seq, _HEARTBEAT)
+            if ultimo is None or ultimo <= seq:
+                yield ": ping\n\n"
+                continue
+
+            conn = leitura(vinculada_ao_request=False)
+            try:
+                mudancas, novo_seq, completo = alteracoes.desde(conn, seq, _LOTE, usuario=usuario)
+                eventos = _payloads(conn, mudancas) if completo else []
+            finally:
+                conn.close()
+
+            seq = novo_seq
+            cursor = alteracoes.encode_cursor(seq)
+            if not completo:
+                yield _sse("recarregar", {}, cursor)
+                continue
+            for ev in eventos:
+                yield _sse("alteracao", ev, cursor)
+            if not eventos:
+                # lote só com alterações de outros usuários: avança o cursor do navegador mesmo assim
+                yield f"id: {cursor}\n\n"
+
+    resp = Response(stream_with_context(gerar()), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"  # nginx: não segurar o stream em buffer
+    return resp
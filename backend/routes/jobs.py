@@ -0,0 +1,60 @@
+# backend/routes/jobs.py
+from flask import Blueprint, jsonify, session
+
+from backend import jobs
+from backend.db import leitura
+
+jobs_bp = Blueprint("jobs", __name__)
+
+# quem pode ver a fila de tarefas
+_TIPOS_PERMITIDOS = {"consultor", "administrador"}
+
+
+def _is_logged():
+    return session.get("user") is not None
+
+
+def _tipo():
+    return (session.get("type") or "").strip().lower()
+
+
+def _negado():
+    if not _is_logged():
+        return jsonify({"ok": False, "error": "not_logged"}), 401
+    if _tipo() not in _TIPOS_PERMITIDOS:
+        return jsonify({"ok": False, "error": "forbidden"}), 403
+    return None
+
+
+# =========================
+# Inspeção da fila de tarefas
+# =========================
+@jobs_bp.route("/api/jobs", methods=["GET"])
+def api_jobs_resumo():
+    """Quantidade por status + últimas falhas."""
+    negado = _negado()
+    if negado:
+        return negado
+
+    db = leitura()
+    try:
+        return jsonify({"ok": True, **jobs.resumo(db)})
+    finally:
+        db.close()
+
+
+@jobs_bp.route("/api/jobs/<int:job_id>", methods=["GET"])
+def api_job_status(job_id):
+    negado = _negado()
+    if negado:
+        return negado
+
+    db = leitura()
+    try:
+        job = jobs.status(db, job_id)
+    finally:
+        db.close()
+
+    if not job:
+        return jsonify({"ok": False, "error": "job_not_found"}), 404
+    return jsonify({"ok": True, "job": job})
@@ -1,16 +1,16 @@
 import os
-import random
-import sqlite3
 import shutil
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
 from flask import Blueprint, render_template, session, redirect, url_for, request, current_app
 from flask import flash
 
-sol_agendamento_bp = Blueprint("sol_agendamento", __name__)
-
+from backend.db import escrita
+from backend.anexos import AnexoInvalido, guardar_stream, validar_pdf, vincular
+from backend.protocolo import gerar as gerar_protocolo
+from backend.jobs import enfileirar, tarefa
 
-def _db_path():
-    return os.path.abspath(current_app.config.get("DATABASE", "database/Users.db"))
+sol_agendamento_bp = Blueprint("sol_agendamento", __name__)
 
 
 def _pasta_admissional_base():
@@ -42,9 +42,55 @@ def _safe_join(base, *paths):
     return final_abs
 
 
-def _colunas_tabela(cursor, tabela: str) -> set[str]:
-    cursor.execute(f'PRAGMA table_info("{tabela}")')
-    return {row[1] for row in cursor.fetchall()}  # row[1] = nome da coluna
+def _guardar_anexo(arquivo, tabela):
+    """
+    Guarda o upload (PDF) no store de anexos (1 cópia por conteúdo, SHA-256).
+    Copia em blocos: assinatura %PDF- checada no 1º bloco e limite por tipo (UPLOAD_LIMITES_MB).
+    Retorna (sha256, tamanho); AnexoInvalido se o arquivo for recusado.
+    Não precisa de protocolo: o hardlink na pasta do protocolo sai em _gravar().
+    """
+    limite_mb = current_app.config.get("UPLOAD_LIMITES_MB", {}).get(tabela)
+    limite = limite_mb * 1024 * 1024 if limite_mb else None
+    return guardar_stream(arquivo.stream, limite=limite, validar=validar_pdf)
+
+
+def _gravar(pasta_base, sql, valores, nome_arquivo=None, arquivo_sha=None):
+    """
+    Grava a solicitação JÁ validada e retorna o protocolo.
+    O protocolo é gerado na mesma transação do INSERT (`sql` recebe o protocolo como 1º
+    parâmetro, seguido de `valores`): envio recusado não gasta número e, se algo falhar
+    até o commit, o rollback devolve o número para a sequência.
+    A pasta do protocolo (e o hardlink do anexo) é criada antes do commit.
+    """
+    conn = escrita()
+    try:
+        protocolo = gerar_protocolo(conn)
+
+        pasta_destino = _safe_join(pasta_base, protocolo)
+        os.makedirs(pasta_destino, exist_ok=True)
+        if arquivo_sha:
+            vincular(arquivo_sha, os.path.join(pasta_destino, nome_arquivo))
+
+        conn.execute(sql, (protocolo, *valores))
+        conn.commit()
+    finally:
+        conn.close()  # sem commit: transação desfeita (número volta para a sequência)
+    return protocolo
+
+
+@sol_agendamento_bp.errorhandler(RequestEntityTooLarge)
+def _upload_grande(e):
+    limite_mb = (current_app.config.get("MAX_CONTENT_LENGTH") or 0) // (1024 * 1024)
+    flash(f"❌ O envio passa do limite de {limite_mb} MB.", "erro")
+    return redirect(url_for("sol_agendamento.solicitacao_agendamento"))
+
+
+@tarefa("excluir_pasta_admissional")
+def _job_excluir_pasta(payload):
+    """(fila de tarefas) Remove a pasta do protocolo excluído. Idempotente."""
+    pasta = _safe_join(_pasta_admissional_base(), payload["protocolo"])
+    if os.path.exists(pasta):
+        shutil.rmtree(pasta)
 
 
 @sol_agendamento_bp.route("/admissional/excluir/<protocolo>", methods=["POST"])
@@ -53,29 +99,29 @@ def excluir_admissional(protocolo):
         return redirect(url_for("auth.login"))
 
     try:
-        conn = sqlite3.connect(_db_path())
+        conn = escrita()
         cur = conn.cursor()
 
         cur.execute("SELECT id FROM solicitacoes_admissional WHERE protocolo = ?", (protocolo,))
         row = cur.fetchone()
         if not row:
             conn.close()
-            return redirect(url_for("home.home"))
+            return redirect(url_for("home_router.dashboard"))
 
-        # ✅ apaga a pasta primeiro; se der erro, NÃO perde o registro no banco
-        pasta = _safe_join(_pasta_admissional_base(), protocolo)
-        if os.path.exists(pasta):
-            shutil.rmtree(pasta)
+        # ✅ valida o caminho antes de apagar qualquer coisa
+        _safe_join(_pasta_admissional_base(), protocolo)
 
-        # ✅ depois apaga do banco
+        # ✅ apaga do banco e agenda a remoção da pasta no MESMO commit:
+        # a pasta sai em segundo plano (com novas tentativas se o disco falhar)
         cur.execute("DELETE FROM solicitacoes_admissional WHERE protocolo = ?", (protocolo,))
+        enfileirar(conn, "excluir_pasta_admissional", {"protocolo": protocolo})
         conn.commit()
         conn.close()
 
     except Exception as e:
         return f"Erro ao excluir: {e}", 500
 
-    return redirect(url_for("home.home"))
+    return redirect(url_for("home_router.dashboard"))
 
 
 @sol_agendamento_bp.route("/solicitacao-agendamento", methods=["GET", "POST"])
@@ -105,10 +151,11 @@ def solicitacao_agendamento():
                 tipo_exame=tipo_exame_atual,
             )
 
-        protocolo_gerado = f"VENDRAME{random.randint(0, 9999999999):010d}SP"
         usuario_logado = session.get("user", "N/A")
 
         try:
+            # ✅ protocolo único e ordenado por criação (sequência do dia no banco):
+            # só é gerado em _gravar(), depois de validar o envio
             # ==========================================================
             # ✅ ADMISSIONAL
             # ==========================================================
@@ -148,14 +195,10 @@ def solicitacao_agendamento():
                         tipo_exame=tipo_exame_atual,
                     )
 
-                # ✅ cria pasta do processo (Admissional)
-                pasta_destino = _safe_join(_pasta_admissional_base(), protocolo_gerado)
-                os.makedirs(pasta_destino, exist_ok=True)
-
                 # ✅ upload opcional (PDF) - se existir no seu HTML
                 arquivo = request.files.get("anexo_pdf")  # <input name="anexo_pdf" type="file" />
                 nome_arquivo = None
-                arquivo_binario = None
+                arquivo_sha = arquivo_tamanho = None
 
                 if arquivo and (arquivo.filename or "").strip():
                     if not arquivo.filename.lower().endswith(".pdf"):
@@ -169,56 +212,35 @@ def solicitacao_agendamento():
                         )
 
                     nome_arquivo = secure_filename(arquivo.filename)
-                    arquivo_binario = arquivo.read()
-
-                    caminho_arquivo = os.path.join(pasta_destino, nome_arquivo)
-                    with open(caminho_arquivo, "wb") as f:
-                        f.write(arquivo_binario)
-
-                conn = sqlite3.connect(_db_path())
-                cursor = conn.cursor()
-
-                # ✅ compatível com tabela COM ou SEM colunas de upload
-                cols = _colunas_tabela(cursor, "solicitacoes_admissional")
-                tem_upload = ("nome_arquivo" in cols) and ("arquivo" in cols)
-
-                if tem_upload:
-                    cursor.execute("""
-                        INSERT INTO solicitacoes_admissional (
-                            protocolo, cnpj, unidade, empresa, centro_custo, codigo_rh,
-                            data_preferencia, local_agendar, funcionario, rg, cpf,
-                            nascimento, admissao, funcao, setor, telefone, user,
-                            nome_arquivo, arquivo
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        protocolo_gerado,
-                        cnpj, unidade, empresa, centro_custo, codigo_rh,
-                        data_preferencia, local_agendar,
-                        funcionario, rg, cpf,
-                        nascimento, admissao,
-                        funcao, setor,
-                        telefone, usuario_logado,
-                        nome_arquivo, arquivo_binario
-                    ))
-                else:
-                    cursor.execute("""
-                        INSERT INTO solicitacoes_admissional (
-                            protocolo, cnpj, unidade, empresa, centro_custo, codigo_rh,
-                            data_preferencia, local_agendar, funcionario, rg, cpf,
-                            nascimento, admissao, funcao, setor, telefone, user
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        protocolo_gerado,
-                        cnpj, unidade, empresa, centro_custo, codigo_rh,
-                        data_preferencia, local_agendar,
-                        funcionario, rg, cpf,
-                        nascimento, admissao,
-                        funcao, setor,
-                        telefone, usuario_logado
-                    ))
-
-                conn.commit()
-                conn.close()
+                    try:
+                        arquivo_sha, arquivo_tamanho = _guardar_anexo(arquivo, "solicitacoes_admissional")
+                    except AnexoInvalido as e:
+                        flash(str(e), "erro")
+                        return render_template(
+                            "solicitacao_agendamento.html",
+                            erro=erro,
+                            sucesso=None,
+                            protocolo=None,
+                            tipo_exame=tipo_exame_atual,
+                        )
+
+                # ✅ schema garantido pelas migrações: anexo = referência no store (BLOB fica NULL)
+                protocolo_gerado = _gravar(_pasta_admissional_base(), """
+                    INSERT INTO solicitacoes_admissional (
+                        protocolo, cnpj, unidade, empresa, centro_custo, codigo_rh,
+                        data_preferencia, local_agendar, funcionario, rg, cpf,
+                        nascimento, admissao, funcao, setor, telefone, user,
+                        nome_arquivo, arquivo_sha256, arquivo_tamanho
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    cnpj, unidade, empresa, centro_custo, codigo_rh,
+                    data_preferencia, local_agendar,
+                    funcionario, rg, cpf,
+                    nascimento, admissao,
+                    funcao, setor,
+                    telefone, usuario_logado,
+                    nome_arquivo, arquivo_sha, arquivo_tamanho
+                ), nome_arquivo, arquivo_sha)
 
                 flash("✅ Solicitação Admissional enviada com sucesso!", "success")
 
@@ -259,28 +281,17 @@ def solicitacao_agendamento():
                         tipo_exame=tipo_exame_atual,
                     )
 
-                # ✅ cria pasta do processo (Periódico)
-                pasta_destino = _safe_join(_pasta_periodico_base(), protocolo_gerado)
-                os.makedirs(pasta_destino, exist_ok=True)
-
-                conn = sqlite3.connect(_db_path())
-                cursor = conn.cursor()
-
-                cursor.execute("""
+                protocolo_gerado = _gravar(_pasta_periodico_base(), """
                     INSERT INTO solicitacoes_periodico (
                         protocolo, funcionario, cpf, empresa,
                         local_agendar, data_preferencia, telefone, user
                     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
-                    protocolo_gerado,
                     funcionario, cpf, empresa,
                     local_agendar, data_preferencia,
                     telefone, usuario_logado
                 ))
 
-                conn.commit()
-                conn.close()
-
                 flash("✅ Solicitação Periódico enviada com sucesso!", "success")
 
             # ==========================================================
@@ -305,28 +316,17 @@ def solicitacao_agendamento():
                         tipo_exame=tipo_exame_atual,
                     )
 
-                # ✅ cria pasta do processo (Demissional) — pasta correta
-                pasta_destino = _safe_join(_pasta_demissional_base(), protocolo_gerado)
-                os.makedirs(pasta_destino, exist_ok=True)
-
-                conn = sqlite3.connect(_db_path())
-                cursor = conn.cursor()
-
-                cursor.execute("""
+                protocolo_gerado = _gravar(_pasta_demissional_base(), """
                     INSERT INTO solicitacoes_demissional (
                         protocolo, funcionario, cpf, empresa,
                         local_agendar, data_preferencia, telefone, user
                     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
-                    protocolo_gerado,
                     funcionario, cpf, empresa,
                     local_agendar, data_preferencia,
                     telefone, usuario_logado
                 ))
 
-                conn.commit()
-                conn.close()
-
                 flash("✅ Solicitação Demissional enviada com sucesso!", "success")
 
             # ==========================================================
@@ -372,38 +372,32 @@ def solicitacao_agendamento():
                         tipo_exame=tipo_exame_atual,
                     )
 
-                # ✅ cria pasta do processo (Retorno ao Trabalho) — certifique-se de ter essa função no arquivo:
-                # def _pasta_retorno_trabalho_base(): return r"...\Documentos_RetornoTrabalho"
-                pasta_destino = _safe_join(_pasta_retorno_trabalho_base(), protocolo_gerado)
-                os.makedirs(pasta_destino, exist_ok=True)
-
-                # salva arquivo no disco + no banco
+                # salva arquivo no store (pasta do protocolo = hardlink) + referência no banco
                 nome_arquivo = secure_filename(arquivo.filename)
-                arquivo_binario = arquivo.read()
-
-                caminho_arquivo = os.path.join(pasta_destino, nome_arquivo)
-                with open(caminho_arquivo, "wb") as f:
-                    f.write(arquivo_binario)
-
-                conn = sqlite3.connect(_db_path())
-                cursor = conn.cursor()
+                try:
+                    arquivo_sha, arquivo_tamanho = _guardar_anexo(arquivo, "solicitacoes_retorno_trabalho")
+                except AnexoInvalido as e:
+                    flash(str(e), "erro")
+                    return render_template(
+                        "solicitacao_agendamento.html",
+                        erro=erro,
+                        sucesso=None,
+                        protocolo=None,
+                        tipo_exame=tipo_exame_atual,
+                    )
 
-                cursor.execute("""
+                protocolo_gerado = _gravar(_pasta_retorno_trabalho_base(), """
                     INSERT INTO solicitacoes_retorno_trabalho (
                         protocolo, funcionario, cpf, empresa,
                         local_agendar, data_preferencia, telefone, user,
-                        nome_arquivo, arquivo
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        nome_arquivo, arquivo_sha256, arquivo_tamanho
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
-                    protocolo_gerado,
                     funcionario, cpf, empresa,
                     local_agendar, data_preferencia,
                     telefone, usuario_logado,
-                    nome_arquivo, arquivo_binario
-                ))
-
-                conn.commit()
-                conn.close()
+                    nome_arquivo, arquivo_sha, arquivo_tamanho
+                ), nome_arquivo, arquivo_sha)
 
                 flash("✅ Solicitação de Retorno ao Trabalho enviada com sucesso!", "success")
 
@@ -441,15 +435,7 @@ def solicitacao_agendamento():
                         tipo_exame=tipo_exame_atual,
                     )
 
-                # ✅ cria pasta do processo (Mudança de riscos) — certifique-se de ter essa função:
-                # def _pasta_mudanca_riscos_base(): return r"...\Documentos_MudancaRiscos"
-                pasta_destino = _safe_join(_pasta_mudanca_riscos_base(), protocolo_gerado)
-                os.makedirs(pasta_destino, exist_ok=True)
-
-                conn = sqlite3.connect(_db_path())
-                cursor = conn.cursor()
-
-                cursor.execute("""
+                protocolo_gerado = _gravar(_pasta_mudanca_riscos_base(), """
                     INSERT INTO solicitacoes_mudanca_riscos (
                         protocolo, funcionario, cpf, empresa,
                         local_agendar, data_preferencia, telefone, user,
@@ -457,7 +443,6 @@ def solicitacao_agendamento():
                         unidade_atual, setor_atual, cargo_atual
                     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
-                    protocolo_gerado,
                     funcionario, cpf, empresa,
                     local_agendar, data_preferencia,
                     telefone, usuario_logado,
@@ -465,9 +450,6 @@ def solicitacao_agendamento():
                     unidade_atual, setor_atual, cargo_atual
                 ))
 
-                conn.commit()
-                conn.close()
-
                 flash("✅ Solicitação de Mudança de riscos ocupacionais enviada com sucesso!", "success")
 
             elif tipo_exame_norm in ("avaliação médica", "avaliacao medica"):
@@ -498,7 +480,8 @@ def solicitacao_agendamento():
 
                 justificativa_texto = None
                 nome_arquivo = None
-                arquivo_binario = None
+                arquivo = None
+                arquivo_sha = arquivo_tamanho = None
 
                 if forma == "texto":
                     justificativa_texto = (request.form.get("am_justificativa") or "").strip()
@@ -531,38 +514,34 @@ def solicitacao_agendamento():
                         )
 
                     nome_arquivo = secure_filename(arquivo.filename)
-                    arquivo_binario = arquivo.read()
-
-                # só cria pasta depois de validar tudo
-                pasta_destino = _safe_join(_pasta_avaliacao_medica_base(), protocolo_gerado)
-                os.makedirs(pasta_destino, exist_ok=True)
 
                 if forma == "pdf":
-                    caminho_arquivo = os.path.join(pasta_destino, nome_arquivo)
-                    with open(caminho_arquivo, "wb") as f:
-                        f.write(arquivo_binario)
+                    try:
+                        arquivo_sha, arquivo_tamanho = _guardar_anexo(arquivo, "solicitacoes_avaliacao_medica")
+                    except AnexoInvalido as e:
+                        msg = str(e)
+                        flash(msg, "erro")
+                        return render_template(
+                            "solicitacao_agendamento.html",
+                            erro=msg, sucesso=None, protocolo=None, tipo_exame=tipo_exame_atual
+                        )
 
-                conn = sqlite3.connect(_db_path())
-                cursor = conn.cursor()
-                cursor.execute("""
+                # só gera protocolo e cria pasta depois de validar tudo
+                protocolo_gerado = _gravar(_pasta_avaliacao_medica_base(), """
                     INSERT INTO solicitacoes_avaliacao_medica (
                         protocolo, funcionario, cpf, empresa,
                         local_agendar, data_preferencia, telefone, user,
                         forma_justificativa, justificativa_texto,
-                        nome_arquivo, arquivo
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        nome_arquivo, arquivo_sha256, arquivo_tamanho
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
-                    protocolo_gerado,
                     funcionario, cpf, empresa,
                     local_agendar, data_preferencia,
                     telefone, usuario_logado,
                     forma,
                     justificativa_texto,
-                    nome_arquivo,
-                    arquivo_binario
-                ))
-                conn.commit()
-                conn.close()
+                    nome_arquivo, arquivo_sha, arquivo_tamanho
+                ), nome_arquivo, arquivo_sha)
 
                 flash("✅ Solicitação de Avaliação médica enviada com sucesso!", "success")
                 return redirect(url_for("sol_agendamento.solicitacao_agendamento"))
@@ -1,8 +1,8 @@
 # backend/routes/solicitacoes_consultor.py
+import heapq
 import os
-import io
-import mimetypes
-import sqlite3
+import json
+import base64
 from datetime import datetime
 from flask import (
     Blueprint,
@@ -14,11 +14,25 @@ from flask import (
     request,
     jsonify,
     send_from_directory,
-    send_file,
     abort,
 )
 from werkzeug.utils import secure_filename
 
+from backend.db import leitura, escrita
+from backend.schema import TIPO_POR_TABELA, get_schema, tipo_da_tabela, tipo_exame
+from backend.documentos import (
+    allowed_doc,
+    doc_base_dirs,
+    em_lotes_com_docs,
+    get_docs_batch,
+    safe_filename,
+)
+from backend.downloads import meta_anexo, enviar_anexo
+from backend.busca import tem_indice, consulta_fts, filtro_sql, buscar
+from backend import alteracoes, cache_paginas, jobs
+from backend.anexos import AnexoGrande, AnexoInvalido, guardar_stream, validar_pdf, vincular
+from backend.jobs import tarefa
+
 solicitacoes_consultor_bp = Blueprint("solicitacoes_consultor", __name__)
 
 # =========================================================
@@ -80,57 +94,74 @@ def _find_existing_protocolo_dir(protocolo: str) -> str | None:
     Procura uma pasta já existente do protocolo dentro de TODAS as bases conhecidas.
     ✅ Se achar, retorna o caminho dela (isso garante salvar na mesma pasta da criação).
     """
-    if not protocolo or not _safe_filename(protocolo):
+    if not protocolo or not safe_filename(protocolo):
         return None
 
-    for base in _doc_base_dirs():
+    for base in doc_base_dirs():
         pasta = os.path.join(base, protocolo)
         if os.path.isdir(pasta):
             return pasta
     return None
 
 
-def _save_consultor_pdf(protocolo: str, origem: str, file_storage):
+def _nome_pdf_final(filename: str):
     """
-    Salva o PDF final do consultor.
-
-    ✅ 1) Se já existir pasta do protocolo em alguma base, salva nela.
-    ✅ 2) Se não existir, cria em base_dir_by_origem(origem)/<protocolo>/.
-
-    Retorna (saved_dir, stored_name, original_name).
+    Nome do PDF final do consultor na pasta do protocolo.
+    Retorna (stored_name, original_name); (None, None) se não for .pdf.
     """
-    if not file_storage or not file_storage.filename:
-        return None, None, None
-
-    original_name = (file_storage.filename or "").strip()
+    original_name = (filename or "").strip()
     safe_name = secure_filename(original_name)
     if not safe_name:
-        return None, None, None
+        return None, None
 
     # só PDF
     if "." not in safe_name or safe_name.rsplit(".", 1)[-1].lower() != "pdf":
-        return None, None, None
+        return None, None
 
-    # ✅ tenta salvar na pasta já existente do protocolo (pasta REAL)
-    pasta_protocolo = _find_existing_protocolo_dir(protocolo)
+    # evita sobrescrever: prefixo com timestamp
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"FINAL_{ts}_{safe_name}", original_name
+
+
+@tarefa("consultor_pdf_final")
+def _job_pdf_final(payload):
+    """
+    (fila de tarefas) Coloca o PDF final — já no store de anexos — na pasta do protocolo
+    e registra em solicitacao_docs. Idempotente: pode rodar de novo depois de um erro.
+
+    ✅ 1) Se já existir pasta do protocolo em alguma base, salva nela.
+    ✅ 2) Se não existir, cria em base_dir_by_origem(origem)/<protocolo>/.
+    """
+    protocolo = payload["protocolo"]
+    stored_name = payload["stored_name"]
 
-    # ✅ se não existir, cria na base pela origem
+    pasta_protocolo = _find_existing_protocolo_dir(protocolo)
     if not pasta_protocolo:
-        base_dir = _base_dir_by_origem(origem)
-        try:
-            pasta_protocolo = _safe_join(base_dir, protocolo)
-        except Exception:
-            return None, None, None
+        pasta_protocolo = _safe_join(_base_dir_by_origem(payload["origem"]), protocolo)
         os.makedirs(pasta_protocolo, exist_ok=True)
 
-    # evita sobrescrever: prefixo com timestamp
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    stored_name = f"FINAL_{ts}_{safe_name}"
-
-    full_path = os.path.join(pasta_protocolo, stored_name)
-    file_storage.save(full_path)
+    vincular(payload["sha256"], os.path.join(pasta_protocolo, stored_name))
 
-    return pasta_protocolo, stored_name, original_name
+    db = escrita()
+    try:
+        if get_schema(db).has_table("solicitacao_docs"):
+            ja = db.execute(
+                "SELECT 1 FROM solicitacao_docs WHERE protocolo = ? AND stored_name = ?",
+                (protocolo, stored_name),
+            ).fetchone()
+            if not ja:
+                db.execute(
+                    """
+                    INSERT INTO solicitacao_docs (protocolo, filename, stored_name)
+                    VALUES (?, ?, ?)
+                    """,
+                    (protocolo, payload["filename"], stored_name),
+                )
+        # arquivo novo na pasta: as telas em cache precisam listar o documento
+        cache_paginas.tocar(db, payload["origem"])
+        db.commit()
+    finally:
+        db.close()
 
 
 # =========================
@@ -144,48 +175,9 @@ def _tipo():
     return (session.get("type") or "").strip().lower()
 
 
-def _db_path():
-    return os.path.abspath(current_app.config.get("DATABASE", "database/Users.db"))
-
-
 def _get_db():
-    conn = sqlite3.connect(_db_path())
-    conn.row_factory = sqlite3.Row
-    return conn
-
-
-def _list_tables(db):
-    rows = db.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name").fetchall()
-    return [r["name"] for r in rows]
-
-
-def _table_columns(db, table_name):
-    cols = db.execute(f'PRAGMA table_info("{table_name}")').fetchall()
-    return [c["name"] for c in cols]
-
-
-def _first_existing(col_list, candidates):
-    for c in candidates:
-        if c in col_list:
-            return c
-    return None
-
-
-def _infer_tipo_exame(table_name, row, cols):
-    if "tipo_exame" in cols:
-        val = row["tipo_exame"]
-        if val:
-            return val
-
-    mapa = {
-        "solicitacoes_admissional": "Admissional",
-        "solicitacoes_periodico": "Periódico",
-        "solicitacoes_demissional": "Demissional",
-        "solicitacoes_retorno_trabalho": "Retorno ao Trabalho",
-        "solicitacoes_avaliacao_medica": "Avaliação Médica",
-        "solicitacoes_mudanca_riscos": "Mudança de Riscos",
-    }
-    return mapa.get(table_name, table_name.replace("solicitacoes_", "").replace("_", " ").title())
+    # listagem e downloads (só leitura); as APIs que gravam usam escrita()
+    return leitura()
 
 
 def _status_slug(v: str) -> str:
@@ -201,92 +193,18 @@ def _status_slug(v: str) -> str:
     return s.replace(" ", "-")
 
 
-def _to_ts(value):
-    """
-    Converte valores de data/tempo comuns do SQLite para timestamp (int).
-    """
-    if value is None:
-        return None
-
-    if isinstance(value, (int, float)):
-        return int(value)
-
-    if isinstance(value, (datetime,)):
-        return int(value.timestamp())
-
-    s = str(value).strip()
-    if not s:
-        return None
-
-    try:
-        if len(s) == 10:
-            dt = datetime.strptime(s, "%Y-%m-%d")
-            return int(dt.timestamp())
-        dt = datetime.fromisoformat(s)
-        return int(dt.timestamp())
-    except Exception:
-        return None
-
-
 # =========================
 # Documentos (mesmo padrão do cliente)
 # =========================
-def _safe_filename(name: str) -> bool:
-    if not name:
-        return False
-    if "/" in name or "\\" in name:
-        return False
-    if ".." in name:
-        return False
-    return True
-
-
-def _allowed_doc(filename: str) -> bool:
-    if not filename or "." not in filename:
-        return False
-    ext = filename.rsplit(".", 1)[-1].lower()
-    allowed = {
-        "pdf", "png", "jpg", "jpeg", "webp",
-        "doc", "docx", "xls", "xlsx", "txt", "csv",
-    }
-    return ext in allowed
-
-
-def _doc_base_dirs():
-    dirs = []
-
-    uploads_dir = os.path.abspath(current_app.config.get("UPLOADS_DIR", "uploads"))
-    dirs.append(uploads_dir)
-
-    defaults = [
-        "database/Documentos_Admissional",
-        "database/Documentos_Periodico",
-        "database/Documentos_Demissional",
-        "database/Documentos_Retorno",
-        "database/Documentos_Avaliacao",
-        "database/Documentos_Mudanca",
-    ]
-    for d in defaults:
-        dirs.append(os.path.abspath(d))
-
-    out = []
-    seen = set()
-    for d in dirs:
-        if d and os.path.isdir(d) and d not in seen:
-            out.append(d)
-            seen.add(d)
-    return out
-
-
 def _resolve_doc_dir(protocolo: str, stored_name: str):
     if not protocolo or not stored_name:
         return None
-    if not _safe_filename(protocolo) or not _safe_filename(stored_name):
+    if not safe_filename(protocolo) or not safe_filename(stored_name):
         return None
-    if not _allowed_doc(stored_name):
+    if not allowed_doc(stored_name):
         return None
 
-    for base in _doc_base_dirs():
+    for base in doc_base_dirs():
         pasta_protocolo = os.path.join(base, protocolo)
         if not os.path.isdir(pasta_protocolo):
             continue
@@ -309,68 +227,6 @@ def _doc_exists_in_list(docs, name_or_stored: str) -> bool:
     return False
 
 
-def _get_docs(db, protocolo):
-    documentos = []
-    if not protocolo:
-        return documentos
-
-    tables = _list_tables(db)
-
-    # Opção A: tabela de docs
-    if "solicitacao_docs" in tables:
-        docs = db.execute(
-            """
-            SELECT filename, stored_name
-            FROM solicitacao_docs
-            WHERE protocolo = ?
-            ORDER BY rowid DESC
-            """,
-            (protocolo,),
-        ).fetchall()
-
-        seen = set()
-        for d in docs:
-            stored = (d["stored_name"] or "").strip()
-            fname = (d["filename"] or "").strip() or stored
-
-            if not (_safe_filename(stored) and _allowed_doc(stored)):
-                continue
-
-            key = stored.casefold()
-            if key in seen:
-                continue
-            seen.add(key)
-
-            documentos.append({"filename": fname, "stored_name": stored})
-
-        return documentos
-
-    # Opção B: pasta base/<protocolo>/
-    encontrados = set()
-    for base in _doc_base_dirs():
-        pasta_protocolo = os.path.join(base, protocolo)
-        if not os.path.isdir(pasta_protocolo):
-            continue
-
-        for fname in sorted(os.listdir(pasta_protocolo)):
-            full = os.path.join(pasta_protocolo, fname)
-            if not os.path.isfile(full):
-                continue
-            if not _safe_filename(fname):
-                continue
-            if not _allowed_doc(fname):
-                continue
-
-            key = fname.casefold()
-            if key in encontrados:
-                continue
-
-            encontrados.add(key)
-            documentos.append({"filename": fname, "stored_name": fname})
-
-    return documentos
-
-
 # =========================
 # API: atualizar status (DB)
 # =========================
@@ -405,16 +261,16 @@ def api_atualizar_status():
     if not _is_allowed_table(origem):
         return jsonify({"ok": False, "error": "invalid_table"}), 400
 
-    db = _get_db()
+    db = escrita()
+    schema = get_schema(db)
 
-    tables = _list_tables(db)
-    if origem not in tables:
+    # só tabelas de solicitação de verdade (não o índice de busca nem tabelas internas)
+    if origem not in schema.solicitacao_tables():
         db.close()
         return jsonify({"ok": False, "error": "table_not_found"}), 404
 
-    cols = _table_columns(db, origem)
-    col_protocolo = _first_existing(cols, ["protocolo", "protocol", "codigo", "id_protocolo"])
-    col_status = _first_existing(cols, ["status_final", "status", "situacao"])
+    col_protocolo = schema.col(origem, "protocolo")
+    col_status = schema.col(origem, "status")
 
     if not col_protocolo or not col_status:
         db.close()
@@ -432,6 +288,111 @@ def api_atualizar_status():
     return jsonify({"ok": True, "status": novo_status, "status_slug": _status_slug(novo_status)}), 200
 
 
+# =========================
+# API: status em lote (1 transação, executemany por tabela)
+# =========================
+_LOTE_MAX = 500
+
+
+@solicitacoes_consultor_bp.route("/api/solicitacoes/status/lote", methods=["POST"])
+def api_atualizar_status_lote():
+    """
+    JSON {"itens": [{"origem", "protocolo", "status"}, ...]} -> resultado por item, na mesma ordem:
+    {"ok": true, "atualizados": N, "resultados": [{"origem", "protocolo", "ok", "status"/"error"}, ...]}
+    Tudo numa transação só: ou grava todos os válidos, ou nenhum (erro de banco = 500).
+    """
+    if not _is_logged():
+        return jsonify({"ok": False, "error": "not_logged"}), 401
+
+    if _tipo() != "consultor":
+        return jsonify({"ok": False, "error": "forbidden"}), 403
+
+    data = request.get_json(silent=True) or {}
+    itens = data.get("itens")
+
+    if not isinstance(itens, list) or not itens:
+        return jsonify({"ok": False, "error": "missing_fields"}), 400
+    if len(itens) > _LOTE_MAX:
+        return jsonify({"ok": False, "error": "too_many_items", "max": _LOTE_MAX}), 400
+
+    db = escrita()
+    schema = get_schema(db)
+    tabelas = set(schema.solicitacao_tables())
+
+    resultados = []
+    por_tabela = {}  # origem -> {protocolo: status} (repetido no lote: vale o último)
+
+    for it in itens:
+        it = it if isinstance(it, dict) else {}
+        protocolo = str(it.get("protocolo") or "").strip()
+        origem = str(it.get("origem") or "").strip()
+        novo_status = str(it.get("status") or "").strip()
+        res = {"origem": origem, "protocolo": protocolo, "ok": False}
+        resultados.append(res)
+
+        if not protocolo or not origem or not novo_status:
+            res["error"] = "missing_fields"
+        elif novo_status not in _ALLOWED_STATUS:
+            res["error"] = "invalid_status"
+        elif not _is_allowed_table(origem):
+            res["error"] = "invalid_table"
+        elif origem not in tabelas:
+            res["error"] = "table_not_found"
+        elif not schema.col(origem, "protocolo") or not schema.col(origem, "status"):
+            res["error"] = "missing_columns"
+        else:
+            res["status"] = novo_status
+            por_tabela.setdefault(origem, {})[protocolo] = novo_status
+
+    existentes = {}
+    try:
+        # BEGIN IMMEDIATE: a checagem de "protocolo existe" e os UPDATEs veem o mesmo banco
+        db.execute("BEGIN IMMEDIATE")
+        for origem, mudancas in por_tabela.items():
+            col_protocolo = schema.col(origem, "protocolo")
+            col_status = schema.col(origem, "status")
+
+            protocolos = list(mudancas)
+            achados = set()
+            for i in range(0, len(protocolos), 500):
+                parte = protocolos[i:i + 500]
+                marks = ",".join("?" * len(parte))
+                achados.update(
+                    r[0] for r in db.execute(
+                        f'SELECT "{col_protocolo}" FROM "{origem}" WHERE "{col_protocolo}" IN ({marks})',
+                        parte,
+                    ).fetchall()
+                )
+            existentes[origem] = achados
+
+            db.executemany(
+                f'UPDATE "{origem}" SET "{col_status}" = ? WHERE "{col_protocolo}" = ?',
+                [(st, p) for p, st in mudancas.items() if p in achados],
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        db.close()
+        current_app.logger.exception("status em lote falhou")
+        return jsonify({"ok": False, "error": "db_error"}), 500
+
+    db.close()
+
+    atualizados = 0
+    for res in resultados:
+        if "status" not in res:
+            continue
+        if res["protocolo"] in existentes.get(res["origem"], ()):
+            res["ok"] = True
+            res["status_slug"] = _status_slug(res["status"])
+            atualizados += 1
+        else:
+            del res["status"]
+            res["error"] = "protocolo_not_found"
+
+    return jsonify({"ok": True, "atualizados": atualizados, "resultados": resultados}), 200
+
+
 # =========================
 # Downloads (consultor também pode baixar)
 # =========================
@@ -442,7 +403,7 @@ def consultor_baixar_documento(protocolo, stored_name):
     if _tipo() != "consultor":
         return redirect(url_for("home_router.dashboard"))
 
-    if not _safe_filename(protocolo) or not _safe_filename(stored_name):
+    if not safe_filename(protocolo) or not safe_filename(stored_name):
         abort(400)
 
     pasta = _resolve_doc_dir(protocolo, stored_name)
@@ -459,39 +420,17 @@ def consultor_baixar_documento_avaliacao(protocolo):
     if _tipo() != "consultor":
         return redirect(url_for("home_router.dashboard"))
 
-    if not _safe_filename(protocolo):
+    if not safe_filename(protocolo):
         abort(400)
 
     db = _get_db()
-    row = db.execute(
-        """
-        SELECT protocolo, nome_arquivo, arquivo
-        FROM solicitacoes_avaliacao_medica
-        WHERE protocolo = ?
-        LIMIT 1
-        """,
-        (protocolo,),
-    ).fetchone()
+    row = meta_anexo(db, "solicitacoes_avaliacao_medica", protocolo)
     db.close()
 
     if not row:
         abort(404)
 
-    nome_arquivo = (row["nome_arquivo"] or "").strip()
-    blob = row["arquivo"]
-
-    if not nome_arquivo or not blob:
-        abort(404)
-
-    mime, _ = mimetypes.guess_type(nome_arquivo)
-    mime = mime or "application/octet-stream"
-
-    return send_file(
-        io.BytesIO(blob),
-        mimetype=mime,
-        as_attachment=True,
-        download_name=nome_arquivo,
-    )
+    return enviar_anexo("solicitacoes_avaliacao_medica", row)
 
 
 @solicitacoes_consultor_bp.route("/consultor/documentos-retorno/<protocolo>", methods=["GET"])
@@ -501,181 +440,525 @@ def consultor_baixar_documento_retorno(protocolo):
     if _tipo() != "consultor":
         return redirect(url_for("home_router.dashboard"))
 
-    if not _safe_filename(protocolo):
+    if not safe_filename(protocolo):
         abort(400)
 
     db = _get_db()
-    row = db.execute(
-        """
-        SELECT protocolo, nome_arquivo, arquivo
-        FROM solicitacoes_retorno_trabalho
-        WHERE protocolo = ?
-        LIMIT 1
-        """,
-        (protocolo,),
-    ).fetchone()
+    row = meta_anexo(db, "solicitacoes_retorno_trabalho", protocolo)
     db.close()
 
     if not row:
         abort(404)
 
-    nome_arquivo = (row["nome_arquivo"] or "").strip()
-    blob = row["arquivo"]
+    return enviar_anexo("solicitacoes_retorno_trabalho", row)
 
-    if not nome_arquivo or not blob:
-        abort(404)
 
-    mime, _ = mimetypes.guess_type(nome_arquivo)
-    mime = mime or "application/octet-stream"
+# =========================
+# Montagem dos cards
+# =========================
+def _row_to_item(schema, tabela, r, docs):
+    cols = schema.columns(tabela)
+
+    def get_any(*names):
+        for n in names:
+            if n in cols:
+                return r[n]
+        return None
 
-    return send_file(
-        io.BytesIO(blob),
-        mimetype=mime,
-        as_attachment=True,
-        download_name=nome_arquivo,
-    )
+    col_protocolo = schema.col(tabela, "protocolo")
+    col_status = schema.col(tabela, "status")
+
+    protocolo_raw = r[col_protocolo]
+    protocolo = (str(protocolo_raw).strip() if protocolo_raw is not None else "")
+
+    status = ""
+    if col_status and r[col_status]:
+        status = str(r[col_status]).strip()
+
+    am_forma_just = get_any("forma_justificativa")
+    am_just_texto = get_any("justificativa_texto")
+    # tamanho vem de length(arquivo) na projeção da listagem (nunca os bytes)
+    tamanho_db = r["arquivo_tamanho"] if "arquivo_tamanho" in r.keys() else None
+
+    am_nome_arquivo = get_any("nome_arquivo")
+    tem_blob_am = bool(tamanho_db) and bool(am_nome_arquivo)
+
+    if tabela == "solicitacoes_avaliacao_medica" and tem_blob_am:
+        nome = str(am_nome_arquivo).strip()
+        if nome and not _doc_exists_in_list(docs, nome):
+            docs.insert(0, {"filename": nome, "stored_name": "__avaliacao_db__"})
+
+    rt_nome_arquivo = get_any("nome_arquivo")
+    tem_blob_rt = bool(tamanho_db) and bool(rt_nome_arquivo)
+
+    if tabela == "solicitacoes_retorno_trabalho" and tem_blob_rt:
+        nome = str(rt_nome_arquivo).strip()
+        if nome and not _doc_exists_in_list(docs, nome):
+            docs.insert(0, {"filename": nome, "stored_name": "__retorno_db__"})
+
+    # ✅ pega a última resposta do consultor (se a coluna existir na tabela)
+    resposta_consultor = get_any("resposta_consultor")
+
+    return {
+        "protocolo": protocolo,
+        "status": status,
+        "status_slug": _status_slug(status),
+        "tipo_exame": tipo_exame(tabela, r, cols),
+
+        "telefone": get_any("telefone", "whatsapp", "celular"),
+        "cpf": get_any("cpf", "cpf_cliente"),
+        "rg": get_any("rg"),
+        "empresa": get_any("empresa"),
+        "local_agendar": get_any("local_agendar", "local", "endereco"),
+        "funcionario": get_any("funcionario", "colaborador"),
+        "data_preferencia": get_any("data_preferencia", "data", "data_agenda", "data_sugerida"),
+        "profissional": get_any("profissional", "medico", "consultor", "responsavel"),
+
+        "cnpj": get_any("cnpj"),
+        "unidade": get_any("unidade"),
+        "centro_custo": get_any("centro_custo"),
+        "codigo_rh": get_any("codigo_rh"),
+        "nascimento": get_any("nascimento"),
+        "admissao": get_any("admissao"),
+        "funcao": get_any("funcao"),
+        "setor": get_any("setor"),
+
+        "forma_justificativa": am_forma_just,
+        "justificativa_texto": am_just_texto,
+        "nome_arquivo": am_nome_arquivo,
+        "tem_arquivo_db": tem_blob_am,
+
+        "unidade_anterior": get_any("unidade_anterior"),
+        "setor_anterior": get_any("setor_anterior"),
+        "cargo_anterior": get_any("cargo_anterior"),
+        "unidade_atual": get_any("unidade_atual"),
+        "setor_atual": get_any("setor_atual"),
+        "cargo_atual": get_any("cargo_atual"),
+
+        "rt_nome_arquivo": rt_nome_arquivo,
+        "tem_arquivo_retorno_db": tem_blob_rt,
+        "tamanho_arquivo_db": tamanho_db,
+
+        "documentos": docs,
+        "_origem": tabela,
+        "_rid": r["_rid"] if "_rid" in r.keys() else None,
+
+        # ✅ NOVO: expõe para o template (qualquer tipo de exame)
+        "resposta_consultor": resposta_consultor,
+    }
+
+
+def _protocolo_da_linha(schema, tabela, r):
+    raw = r[schema.col(tabela, "protocolo")]
+    return str(raw).strip() if raw is not None else ""
+
+
+def _montar_itens(db, schema, linhas):
+    """
+    linhas = [(tabela, row)] já na ordem final.
+    Documentos de todas as linhas resolvidos de uma vez (sem N+1).
+    """
+    protocolos = [_protocolo_da_linha(schema, t, r) for t, r in linhas]
+    docs_map = get_docs_batch(db, schema, protocolos)
+
+    return [
+        _row_to_item(schema, tabela, r, list(docs_map.get(protocolo, [])))
+        for (tabela, r), protocolo in zip(linhas, protocolos)
+    ]
 
 
 # =========================
-# Route (apenas consultor)
+# Modo paginado (filtros no SQL + cursor estável)
 # =========================
-@solicitacoes_consultor_bp.route("/solicitacoes-consultor", methods=["GET"])
-def solicitacoes_consultor():
-    if not _is_logged():
-        return redirect(url_for("auth.login"))
+_PAGE_SIZE_MAX = 200
 
-    if _tipo() != "consultor":
-        return redirect(url_for("home_router.dashboard"))
+# colunas usadas na busca livre (as que existirem na tabela)
+_COLS_BUSCA = ["funcionario", "colaborador", "cpf", "cpf_cliente", "empresa", "protocolo", "local_agendar"]
 
-    db = _get_db()
 
-    all_tables = _list_tables(db)
-    tabelas_solic = [t for t in all_tables if t.startswith("solicitacoes_")]
+def _filtros_da_request():
+    def val(nome):
+        v = (request.args.get(nome) or "").strip()
+        return "" if v.casefold() == "todos" else v
+
+    return {
+        "q": val("q"),
+        "tipo": val("tipo"),
+        "status": val("status"),
+        "protocolo": val("protocolo"),
+    }
+
+
+def _page_size():
+    """
+    Tamanho da página: ?limite=N na URL ou CONSULTOR_PAGE_SIZE no config.
+    0/ausente = modo antigo (lista tudo).
+    """
+    raw = request.args.get("limite")
+    if raw is None:
+        raw = current_app.config.get("CONSULTOR_PAGE_SIZE") or 0
+    try:
+        n = int(raw)
+    except (TypeError, ValueError):
+        return 0
+    return max(0, min(n, _PAGE_SIZE_MAX))
+
+
+def _encode_cursor(sort_value, tabela, rid) -> str:
+    raw = json.dumps([sort_value, tabela, rid], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(token: str):
+    """Cursor opaco -> (sort_value, tabela, rowid). Inválido = None (volta ao início)."""
+    if not token:
+        return None
+    try:
+        pad = "=" * (-len(token) % 4)
+        sort_value, tabela, rid = json.loads(base64.urlsafe_b64decode(token + pad))
+        return int(sort_value), str(tabela), int(rid)
+    except Exception:
+        return None
+
 
-    solicitacoes = []
+def _pagina_consultor(db, filtros, cursor, limite):
+    """
+    Busca UMA página da fila do consultor.
 
-    for tabela in tabelas_solic:
-        cols = _table_columns(db, tabela)
+    Cada tabela devolve no máximo limite+1 linhas depois do cursor (sort_value, tabela, rowid),
+    já filtradas no SQL; o merge final só ordena esses poucos candidatos.
+    Retorna (itens, proximo_cursor).
+    """
+    schema = get_schema(db)
 
-        col_protocolo = _first_existing(cols, ["protocolo", "protocol", "codigo", "id_protocolo"])
-        col_status = _first_existing(cols, ["status_final", "status", "situacao"])
-        col_data = _first_existing(cols, ["criado_em", "created_at", "data_criacao", "data", "timestamp"])
+    q = filtros.get("q") or ""
+    q_digits = "".join(ch for ch in q if ch.isdigit())
+    q_fts = consulta_fts(q) if q and tem_indice(schema) else None
 
+    candidatos = []
+
+    for tabela in schema.solicitacao_tables():
+        cols = schema.columns(tabela)
+
+        col_protocolo = schema.col(tabela, "protocolo")
+        col_status = schema.col(tabela, "status")
         if not col_protocolo:
             continue
 
-        order_sql = f'ORDER BY "{col_data}" ASC' if col_data else "ORDER BY rowid ASC"
-        rows = db.execute(f'SELECT rowid AS _rid, * FROM "{tabela}" {order_sql}').fetchall()
-
-        def get_any(r, *names):
-            for n in names:
-                if n in cols:
-                    return r[n]
-            return None
-
-        for r in rows:
-            protocolo_raw = r[col_protocolo]
-            protocolo = (str(protocolo_raw).strip() if protocolo_raw is not None else "")
-
-            status = ""
-            if col_status and r[col_status]:
-                status = str(r[col_status]).strip()
-
-            sort_value = None
-            if col_data and (col_data in r.keys()):
-                sort_value = _to_ts(r[col_data])
-            if sort_value is None:
-                sort_value = int(r["_rid"])
-
-            docs = _get_docs(db, protocolo)
-
-            am_forma_just = get_any(r, "forma_justificativa")
-            am_just_texto = get_any(r, "justificativa_texto")
-            am_nome_arquivo = get_any(r, "nome_arquivo")
-            am_blob = get_any(r, "arquivo")
-            tem_blob_am = bool(am_blob) and bool(am_nome_arquivo)
-
-            if tabela == "solicitacoes_avaliacao_medica" and tem_blob_am:
-                nome = str(am_nome_arquivo).strip()
-                if nome and not _doc_exists_in_list(docs, nome):
-                    docs.insert(0, {"filename": nome, "stored_name": "__avaliacao_db__"})
-
-            rt_nome_arquivo = get_any(r, "nome_arquivo")
-            rt_blob = get_any(r, "arquivo")
-            tem_blob_rt = bool(rt_blob) and bool(rt_nome_arquivo)
-
-            if tabela == "solicitacoes_retorno_trabalho" and tem_blob_rt:
-                nome = str(rt_nome_arquivo).strip()
-                if nome and not _doc_exists_in_list(docs, nome):
-                    docs.insert(0, {"filename": nome, "stored_name": "__retorno_db__"})
-
-            # ✅ pega a última resposta do consultor (se a coluna existir na tabela)
-            resposta_consultor = get_any(r, "resposta_consultor")
-
-            item = {
-                "_sort_value": int(sort_value),
-
-                "protocolo": protocolo,
-                "status": status,
-                "status_slug": _status_slug(status),
-                "tipo_exame": _infer_tipo_exame(tabela, r, cols),
-
-                "telefone": get_any(r, "telefone", "whatsapp", "celular"),
-                "cpf": get_any(r, "cpf", "cpf_cliente"),
-                "rg": get_any(r, "rg"),
-                "empresa": get_any(r, "empresa"),
-                "local_agendar": get_any(r, "local_agendar", "local", "endereco"),
-                "funcionario": get_any(r, "funcionario", "colaborador"),
-                "data_preferencia": get_any(r, "data_preferencia", "data", "data_agenda", "data_sugerida"),
-                "profissional": get_any(r, "profissional", "medico", "consultor", "responsavel"),
-
-                "cnpj": get_any(r, "cnpj"),
-                "unidade": get_any(r, "unidade"),
-                "centro_custo": get_any(r, "centro_custo"),
-                "codigo_rh": get_any(r, "codigo_rh"),
-                "nascimento": get_any(r, "nascimento"),
-                "admissao": get_any(r, "admissao"),
-                "funcao": get_any(r, "funcao"),
-                "setor": get_any(r, "setor"),
-
-                "forma_justificativa": am_forma_just,
-                "justificativa_texto": am_just_texto,
-                "nome_arquivo": am_nome_arquivo,
-                "tem_arquivo_db": tem_blob_am,
-
-                "unidade_anterior": get_any(r, "unidade_anterior"),
-                "setor_anterior": get_any(r, "setor_anterior"),
-                "cargo_anterior": get_any(r, "cargo_anterior"),
-                "unidade_atual": get_any(r, "unidade_atual"),
-                "setor_atual": get_any(r, "setor_atual"),
-                "cargo_atual": get_any(r, "cargo_atual"),
-
-                "rt_nome_arquivo": rt_nome_arquivo,
-                "tem_arquivo_retorno_db": tem_blob_rt,
-
-                "documentos": docs,
-                "_origem": tabela,
-
-                # ✅ NOVO: expõe para o template (qualquer tipo de exame)
-                "resposta_consultor": resposta_consultor,
-            }
+        where = []
+        params = []
+
+        if filtros.get("tipo"):
+            if "tipo_exame" in cols:
+                where.append("COALESCE(NULLIF(\"tipo_exame\", ''), ?) = ?")
+                params += [tipo_da_tabela(tabela), filtros["tipo"]]
+            elif tipo_da_tabela(tabela).casefold() != filtros["tipo"].casefold():
+                continue
+
+        if filtros.get("status"):
+            if not col_status:
+                continue
+            where.append(f'"{col_status}" = ?')
+            params.append(filtros["status"])
+
+        if filtros.get("protocolo"):
+            where.append(f'"{col_protocolo}" = ?')
+            params.append(filtros["protocolo"])
+
+        if q_fts and filtro_sql(tabela):
+            # índice FTS5 (backend/busca.py): sem LIKE '%...%' varrendo a tabela
+            where.append(filtro_sql(tabela))
+            params.append(q_fts)
+        elif q:
+            busca = [c for c in _COLS_BUSCA if c in cols]
+            conds = [f'"{c}" LIKE ?' for c in busca]
+            params += [f"%{q}%"] * len(busca)
+            col_cpf = schema.col(tabela, "cpf")
+            if q_digits and col_cpf:
+                conds.append(
+                    f"replace(replace(replace(\"{col_cpf}\", '.', ''), '-', ''), ' ', '') LIKE ?"
+                )
+                params.append(f"%{q_digits}%")
+            if not conds:
+                continue
+            where.append("(" + " OR ".join(conds) + ")")
+
+        # chave de ordenação calculada no banco: o cursor entra no WHERE
+        sort = schema.ordem_sql(tabela)
+
+        # keyset: (sort_value, tabela, rowid) > cursor
+        if cursor:
+            c_sort, c_tabela, c_rid = cursor
+            if tabela > c_tabela:
+                where.append(f"{sort} >= ?")
+                params.append(c_sort)
+            elif tabela == c_tabela:
+                where.append(f"({sort}, rowid) > (?, ?)")
+                params += [c_sort, c_rid]
+            else:
+                where.append(f"{sort} > ?")
+                params.append(c_sort)
+
+        where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+        sql = (
+            f'SELECT rowid AS _rid, {sort} AS _sort, {schema.listing_sql(tabela)} FROM "{tabela}" '
+            f"{where_sql} ORDER BY _sort ASC, _rid ASC LIMIT ?"
+        )
+        params.append(limite + 1)
+
+        for r in db.execute(sql, params).fetchall():
+            candidatos.append((int(r["_sort"]), tabela, int(r["_rid"]), r))
+
+    candidatos.sort(key=lambda c: (c[0], c[1], c[2]))
+
+    pagina = candidatos[:limite]
+    proximo = None
+    if len(candidatos) > limite and pagina:
+        ult = pagina[-1]
+        proximo = _encode_cursor(ult[0], ult[1], ult[2])
+
+    linhas = [(tabela, r) for _sort, tabela, _rid, r in pagina]
+    return _montar_itens(db, schema, linhas), proximo
+
+
+# =========================
+# API: busca textual (FTS5)
+# =========================
+_BUSCA_LIMITE_MAX = 50
+
+
+@solicitacoes_consultor_bp.route("/api/solicitacoes/busca", methods=["GET"])
+def api_buscar_solicitacoes():
+    """Resultados ranqueados (bm25) por nome, CPF, empresa, protocolo, local ou resposta."""
+    if not _is_logged():
+        return jsonify({"ok": False, "error": "not_logged"}), 401
+    if _tipo() != "consultor":
+        return jsonify({"ok": False, "error": "forbidden"}), 403
+
+    q = (request.args.get("q") or "").strip()
+    try:
+        limite = max(1, min(int(request.args.get("limite") or 20), _BUSCA_LIMITE_MAX))
+    except ValueError:
+        limite = 20
+
+    db = _get_db()
+    schema = get_schema(db)
+
+    if not tem_indice(schema):
+        db.close()
+        return jsonify({"ok": False, "error": "search_index_missing"}), 503
+
+    itens = buscar(db, q, limite)
+
+    # status atual de cada resultado: 1 query por tabela envolvida
+    por_tabela = {}
+    for it in itens:
+        por_tabela.setdefault(it["tabela"], []).append(it["rid"])
+
+    status = {}
+    for tabela, rids in por_tabela.items():
+        col_status = schema.col(tabela, "status")
+        if not col_status:
+            continue
+        marks = ",".join("?" * len(rids))
+        for r in db.execute(
+            f'SELECT rowid AS rid, "{col_status}" AS status FROM "{tabela}" WHERE rowid IN ({marks})',
+            rids,
+        ).fetchall():
+            status[(tabela, r["rid"])] = r["status"]
 
-            solicitacoes.append(item)
+    db.close()
+
+    for it in itens:
+        st = status.get((it["tabela"], it["rid"])) or "Em Aberto"
+        it["tipo_exame"] = tipo_da_tabela(it["tabela"])
+        it["status"] = st
+        it["status_slug"] = _status_slug(st)
+        it["score"] = round(it["score"], 4)
+
+    return jsonify({"ok": True, "q": q, "itens": itens})
+
+
+# =========================
+# API: delta da fila (log de alterações)
+# =========================
+_ALTERACOES_LIMITE = 200
+
+
+@solicitacoes_consultor_bp.route("/api/solicitacoes/alteracoes", methods=["GET"])
+def api_alteracoes_solicitacoes():
+    """
+    Solicitações criadas/alteradas/apagadas depois do cursor (?desde=...).
+    Cada alterada vem com o HTML do card (mesmo partial da página); o JS só troca esses cards.
+    Sem cursor: devolve só o cursor atual. recarregar=True: cursor velho demais (log podado).
+    """
+    if not _is_logged():
+        return jsonify({"ok": False, "error": "not_logged"}), 401
+    if _tipo() != "consultor":
+        return jsonify({"ok": False, "error": "forbidden"}), 403
+
+    db = _get_db()
+    schema = get_schema(db)
 
+    if not schema.has_table(alteracoes.TABELA):
+        db.close()
+        return jsonify({"ok": False, "error": "change_log_missing"}), 503
+
+    seq = alteracoes.decode_cursor((request.args.get("desde") or "").strip())
+    if seq is None:
+        cursor = alteracoes.encode_cursor(alteracoes.ultimo_seq(db))
+        db.close()
+        return jsonify({"ok": True, "cursor": cursor, "itens": [], "removidos": []})
+
+    mudancas, novo_seq, completo = alteracoes.desde(db, seq, _ALTERACOES_LIMITE)
+    if not completo:
+        db.close()
+        return jsonify({"ok": True, "recarregar": True, "cursor": alteracoes.encode_cursor(novo_seq)})
+
+    # linhas atuais das alteradas: 1 query por tabela
+    por_tabela = {}
+    for m in mudancas:
+        if m["op"] != "D" and m["tabela"] in schema.solicitacao_tables():
+            por_tabela.setdefault(m["tabela"], []).append(m["rid"])
+
+    atuais = {}
+    for tabela, rids in por_tabela.items():
+        marks = ",".join("?" * len(rids))
+        for r in db.execute(
+            f'SELECT rowid AS _rid, {schema.listing_sql(tabela)} FROM "{tabela}" WHERE rowid IN ({marks})',
+            rids,
+        ).fetchall():
+            atuais[(tabela, r["_rid"])] = r
+
+    linhas = [(m["tabela"], atuais[(m["tabela"], m["rid"])]) for m in mudancas if (m["tabela"], m["rid"]) in atuais]
+    itens = _montar_itens(db, schema, linhas)
     db.close()
 
-    solicitacoes.sort(key=lambda x: x.get("_sort_value", 10**18))
-    for s in solicitacoes:
-        s.pop("_sort_value", None)
+    return jsonify({
+        "ok": True,
+        "cursor": alteracoes.encode_cursor(novo_seq),
+        "itens": [
+            {
+                "origem": it["_origem"],
+                "rid": it["_rid"],
+                "protocolo": it["protocolo"],
+                "html": render_template("partials/solicitacao_consultor_card.html", s=it),
+            }
+            for it in itens
+        ],
+        "removidos": [
+            {"origem": m["tabela"], "rid": m["rid"], "protocolo": m["protocolo"]}
+            for m in mudancas
+            if m["op"] == "D"
+        ],
+    })
+
+
+# =========================
+# Route (apenas consultor)
+# =========================
+@solicitacoes_consultor_bp.route("/solicitacoes-consultor", methods=["GET"])
+def solicitacoes_consultor():
+    if not _is_logged():
+        return redirect(url_for("auth.login"))
+
+    if _tipo() != "consultor":
+        return redirect(url_for("home_router.dashboard"))
 
-    tipos = sorted({(s.get("tipo_exame") or "").strip() for s in solicitacoes if s.get("tipo_exame")})
-    protocolos = sorted({(s.get("protocolo") or "").strip() for s in solicitacoes if s.get("protocolo")})
+    db = _get_db()
 
-    return render_template(
+    # ✅ a fila é a mesma para todo consultor: chave = filtros/página da URL
+    chave = ("solicitacoes_consultor", tuple(sorted(request.args.items(multi=True))))
+    return cache_paginas.pagina(db, chave, lambda: _fila_consultor_stream(db))
+
+
+def _linhas_da_tabela(cur, tabela):
+    for r in cur:
+        yield r["_sort"], tabela, r
+
+
+def _opcoes_filtro(db, schema, tabela, tipos, protocolos):
+    """Tipos e protocolos dos selects do topo (que vêm ANTES da lista), sem montar os cards."""
+    col_protocolo = schema.col(tabela, "protocolo")
+    for (p,) in db.execute(f'SELECT "{col_protocolo}" FROM "{tabela}"'):
+        p = str(p).strip() if p is not None else ""
+        if p:
+            protocolos.add(p)
+
+    if schema.has_column(tabela, "tipo_exame"):
+        valores = [r[0] for r in db.execute(f'SELECT DISTINCT "tipo_exame" FROM "{tabela}"')]
+    else:
+        valores = [None] if db.execute(f'SELECT 1 FROM "{tabela}" LIMIT 1').fetchone() else []
+    for v in valores:
+        tipo = v if v else tipo_da_tabela(tabela)
+        if tipo and str(tipo).strip():
+            tipos.add(str(tipo).strip())
+
+
+def _fila_consultor_stream(db):
+    # ✅ cursor do log de alterações ANTES de ler a lista: o que mudar no meio vem no próximo delta
+    cursor_alteracoes = None
+    if get_schema(db).has_table(alteracoes.TABELA):
+        cursor_alteracoes = alteracoes.encode_cursor(alteracoes.ultimo_seq(db))
+
+    limite = _page_size()
+    if limite:
+        filtros = _filtros_da_request()
+        cursor_atual = (request.args.get("cursor") or "").strip()
+        solicitacoes, proximo_cursor = _pagina_consultor(
+            db, filtros, _decode_cursor(cursor_atual), limite
+        )
+
+        return cache_paginas.stream(
+            "solicitacoes_consultor.html",
+            solicitacoes=solicitacoes,
+            tipos=sorted(set(TIPO_POR_TABELA.values())),
+            protocolos=[],
+            paginado=True,
+            filtros=filtros,
+            limite=limite,
+            cursor_atual=cursor_atual,
+            proximo_cursor=proximo_cursor,
+            cursor_alteracoes=cursor_alteracoes,
+        )
+
+    schema = get_schema(db)
+
+    por_tabela = []
+    tipos = set()
+    protocolos = set()
+
+    for tabela in schema.solicitacao_tables():
+        col_protocolo = schema.col(tabela, "protocolo")
+        if not col_protocolo:
+            continue
+
+        _opcoes_filtro(db, schema, tabela, tipos, protocolos)
+
+        # chave de ordenação calculada no banco (schema.ordem_sql): cada tabela já vem em ordem
+        sort_sql = schema.ordem_sql(tabela)
+        cur = db.execute(
+            f'SELECT rowid AS _rid, {sort_sql} AS _sort, {schema.listing_sql(tabela)} '
+            f'FROM "{tabela}" ORDER BY {sort_sql} ASC, rowid ASC'
+        )
+        por_tabela.append(_linhas_da_tabela(cur, tabela))
+
+    # intercala as tabelas conforme o template pede (cursores abertos, nada de fetchall)
+    linhas = ((tabela, r) for _sort, tabela, r in heapq.merge(*por_tabela, key=lambda x: x[0]))
+    solicitacoes = (
+        _row_to_item(schema, tabela, r, docs)
+        for tabela, r, docs in em_lotes_com_docs(
+            db, schema, linhas, lambda t, r: _protocolo_da_linha(schema, t, r)
+        )
+    )
+
+    return cache_paginas.stream(
         "solicitacoes_consultor.html",
         solicitacoes=solicitacoes,
-        tipos=tipos,
-        protocolos=protocolos,
+        tipos=sorted(tipos),
+        protocolos=sorted(protocolos),
+        paginado=False,
+        cursor_alteracoes=cursor_alteracoes,
     )
 
 
@@ -700,27 +983,26 @@ def api_salvar_avaliacao_consultor():
     if not _is_allowed_table(origem):
         return jsonify({"ok": False, "error": "invalid_table"}), 400
 
-    if not _safe_filename(protocolo):
+    if not safe_filename(protocolo):
         return jsonify({"ok": False, "error": "invalid_protocolo"}), 400
 
-    db = _get_db()
+    db = escrita()
+    schema = get_schema(db)
 
-    tables = _list_tables(db)
-    if origem not in tables:
+    # só tabelas de solicitação de verdade (não o índice de busca nem tabelas internas)
+    if origem not in schema.solicitacao_tables():
         db.close()
         return jsonify({"ok": False, "error": "table_not_found"}), 404
 
-    cols = _table_columns(db, origem)
-
-    col_protocolo = _first_existing(cols, ["protocolo", "protocol", "codigo", "id_protocolo"])
-    col_status = _first_existing(cols, ["status_final", "status", "situacao"])
+    col_protocolo = schema.col(origem, "protocolo")
+    col_status = schema.col(origem, "status")
     col_resposta = "resposta_consultor"
 
     if not col_protocolo or not col_status:
         db.close()
         return jsonify({"ok": False, "error": "missing_columns"}), 400
 
-    if col_resposta not in cols:
+    if not schema.has_column(origem, col_resposta):
         db.close()
         return jsonify({"ok": False, "error": "column_not_found"}), 400
 
@@ -733,36 +1015,46 @@ def api_salvar_avaliacao_consultor():
         db.close()
         return jsonify({"ok": False, "error": "status_not_finalizado"}), 400
 
-    db.execute(
-        f'UPDATE "{origem}" SET "{col_resposta}" = ? WHERE "{col_protocolo}" = ?',
-        (resposta, protocolo),
-    )
-    db.commit()
-
-    saved_dir = stored_name = original_name = None
+    # ✅ PDF: validado e copiado para o store aqui; colocar na pasta do protocolo (disco de rede,
+    # lento) fica para a fila de tarefas. Resposta + tarefa entram no mesmo commit.
+    stored_name = original_name = sha = None
     if arquivo and arquivo.filename:
-        saved_dir, stored_name, original_name = _save_consultor_pdf(protocolo, origem, arquivo)
+        stored_name, original_name = _nome_pdf_final(arquivo.filename)
         if not stored_name:
             db.close()
             return jsonify({"ok": False, "error": "invalid_pdf"}), 400
+        limite_mb = current_app.config.get("UPLOAD_LIMITES_MB", {}).get("consultor_pdf_final")
+        limite = limite_mb * 1024 * 1024 if limite_mb else None
+        try:
+            sha, _tamanho = guardar_stream(arquivo.stream, limite=limite, validar=validar_pdf)
+        except AnexoGrande:
+            db.close()
+            return jsonify({"ok": False, "error": "file_too_large"}), 413
+        except AnexoInvalido:
+            db.close()
+            return jsonify({"ok": False, "error": "invalid_pdf"}), 400
 
-        if "solicitacao_docs" in tables:
-            try:
-                db.execute(
-                    """
-                    INSERT INTO solicitacao_docs (protocolo, filename, stored_name)
-                    VALUES (?, ?, ?)
-                    """,
-                    (protocolo, original_name, stored_name),
-                )
-                db.commit()
-            except Exception:
-                pass
+    db.execute(
+        f'UPDATE "{origem}" SET "{col_resposta}" = ? WHERE "{col_protocolo}" = ?',
+        (resposta, protocolo),
+    )
 
+    job_id = None
+    if sha:
+        job_id = jobs.enfileirar(db, "consultor_pdf_final", {
+            "sha256": sha,
+            "protocolo": protocolo,
+            "origem": origem,
+            "stored_name": stored_name,
+            "filename": original_name,
+        })
+
+    db.commit()
     db.close()
 
     return jsonify({
         "ok": True,
         "stored_name": stored_name,
         "filename": original_name,
+        "job_id": job_id,
     })
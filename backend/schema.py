@@ -0,0 +1,191 @@
+# backend/schema.py
+"""
+Cache de metadados do schema (tabelas, colunas e aliases de colunas), por processo.
+
+Antes cada request (e cada linha, no _get_docs) rodava sqlite_master / PRAGMA table_info.
+Agora o schema é lido UMA vez e só é relido quando o PRAGMA schema_version muda
+(ALTER TABLE, CREATE INDEX, migração...), o que vale também para outros processos.
+"""
+import os
+import threading
+
+from flask import current_app, has_app_context
+
+# nomes possíveis de cada coluna "lógica" (mesma ordem de prioridade que as rotas usavam)
+ALIASES = {
+    "protocolo": ["protocolo", "protocol", "codigo", "id_protocolo"],
+    "status": ["status_final", "status", "situacao"],
+    "cpf": ["cpf", "cpf_cliente"],
+    "user": ["user", "usuario", "login"],
+    "data": ["criado_em", "created_at", "data_criacao", "data", "timestamp"],
+}
+
+# tabelas internas com o prefixo solicitacoes_ que NÃO são solicitação (log de alterações)
+INTERNAS = {"solicitacoes_alteracoes"}
+
+# rótulo do tipo de exame de cada tabela (filtro e cards das listagens)
+TIPO_POR_TABELA = {
+    "solicitacoes_admissional": "Admissional",
+    "solicitacoes_periodico": "Periódico",
+    "solicitacoes_demissional": "Demissional",
+    "solicitacoes_retorno_trabalho": "Retorno ao Trabalho",
+    "solicitacoes_avaliacao_medica": "Avaliação Médica",
+    "solicitacoes_mudanca_riscos": "Mudança de Riscos",
+}
+
+_lock = threading.Lock()
+_cache = {}  # chave (caminho do banco) -> Schema
+
+
+def tipo_da_tabela(table_name):
+    return TIPO_POR_TABELA.get(
+        table_name, table_name.replace("solicitacoes_", "").replace("_", " ").title()
+    )
+
+
+def tipo_exame(table_name, row, cols):
+    """tipo_exame gravado na linha (se a tabela tiver a coluna) ou o tipo da tabela."""
+    if "tipo_exame" in cols:
+        val = row["tipo_exame"]
+        if val:
+            return val
+
+    return tipo_da_tabela(table_name)
+
+
+def first_existing(col_list, candidates):
+    for c in candidates:
+        if c in col_list:
+            return c
+    return None
+
+
+class Schema:
+    """Foto do schema em uma versão (schema_version) específica."""
+
+    def __init__(self, version, columns, types, virtual=()):
+        self.version = version
+        self.tables = sorted(columns)
+        self._virtual = set(virtual)     # tabelas virtuais (FTS5) + tabelas internas delas
+        self._columns = columns          # tabela -> [colunas] (ordem do PRAGMA)
+        self._colsets = {t: set(c) for t, c in columns.items()}
+        self._types = types              # tabela -> {coluna: tipo declarado}
+        self._aliases = {
+            t: {alias: first_existing(cols, cands) for alias, cands in ALIASES.items()}
+            for t, cols in columns.items()
+        }
+        self._listing_sql = {t: self._build_listing_sql(t) for t in columns}
+
+    def has_table(self, table):
+        return table in self._columns
+
+    def columns(self, table):
+        return self._columns.get(table, [])
+
+    def has_column(self, table, column):
+        return column in self._colsets.get(table, ())
+
+    def column_type(self, table, column):
+        return (self._types.get(table, {}).get(column) or "").upper()
+
+    def col(self, table, alias):
+        """Coluna real para um alias lógico (protocolo/status/cpf/user/data) ou None."""
+        return self._aliases.get(table, {}).get(alias)
+
+    def ordem_sql(self, table):
+        """
+        Chave SQL da ordem de criação nas listagens: "created_at" (epoch INTEGER da migração
+        0008, com índice) quando a tabela tem; senão rowid. O ORDER BY de cada tabela e o merge
+        entre tabelas usam esta MESMA chave (selecionada como _sort).
+        """
+        return '"created_at"' if self.has_column(table, "created_at") else "rowid"
+
+    def solicitacao_tables(self):
+        return [
+            t for t in self.tables
+            if t.startswith("solicitacoes_") and t not in self._virtual and t not in INTERNAS
+        ]
+
+    def is_blob(self, table, column):
+        return "BLOB" in self.column_type(table, column) or column == "arquivo"
+
+    def blob_columns(self, table):
+        return [c for c in self.columns(table) if self.is_blob(table, c)]
+
+    def listing_sql(self, table):
+        """
+        Projeção explícita para listagens: todas as colunas MENOS as BLOB.
+        Cada BLOB vira "<col>_tamanho" (coluna de tamanho ou length), então a listagem
+        nunca lê os bytes do anexo.
+        """
+        return self._listing_sql.get(table, "*")
+
+    def _build_listing_sql(self, table):
+        cols = self.columns(table)
+        blobs = set(self.blob_columns(table))
+        tamanhos = {f"{b}_tamanho" for b in blobs}
+        parts = []
+        for c in cols:
+            if c in blobs or c in tamanhos:
+                continue
+            parts.append(f'"{c}"')
+        for b in sorted(blobs):
+            # anexo já movido para o store: tamanho guardado; senão, length do BLOB
+            if f"{b}_tamanho" in cols:
+                parts.append(f'COALESCE("{b}_tamanho", length("{b}")) AS "{b}_tamanho"')
+            else:
+                parts.append(f'length("{b}") AS "{b}_tamanho"')
+        return ", ".join(parts) if parts else "*"
+
+
+def _schema_version(db):
+    return db.execute("PRAGMA schema_version").fetchone()[0]
+
+
+def _load(db, version):
+    columns = {}
+    types = {}
+    rows = db.execute("SELECT name, sql FROM sqlite_master WHERE type='table' ORDER BY name").fetchall()
+    for r in rows:
+        name = r[0]
+        info = db.execute(f'PRAGMA table_info("{name}")').fetchall()
+        columns[name] = [c[1] for c in info]
+        types[name] = {c[1]: c[2] for c in info}
+
+    # FTS5 cria <nome>_data, <nome>_idx, <nome>_content... junto com a virtual
+    virtuais = [r[0] for r in rows if (r[1] or "").upper().startswith("CREATE VIRTUAL")]
+    virtual = {t for t in columns for v in virtuais if t == v or t.startswith(v + "_")}
+    return Schema(version, columns, types, virtual)
+
+
+def get_schema(db, key=None):
+    """
+    Retorna o Schema do banco da conexão `db`.
+    Custo normal: 1 PRAGMA schema_version. Só relê o catálogo se a versão mudou.
+    """
+    if key is None:
+        if has_app_context():
+            key = os.path.abspath(current_app.config.get("DATABASE", "database/Users.db"))
+        else:
+            key = "default"
+
+    version = _schema_version(db)
+    schema = _cache.get(key)
+    if schema is not None and schema.version == version:
+        return schema
+
+    with _lock:
+        schema = _cache.get(key)
+        if schema is None or schema.version != version:
+            schema = _load(db, version)
+            _cache[key] = schema
+    return schema
+
+
+def invalidate(key=None):
+    """Descarta o cache (ex.: depois de rodar uma migração no mesmo processo)."""
+    with _lock:
+        if key is None:
+            _cache.clear()
+        else:
+            _cache.pop(key, None)
@@ -0,0 +1,39 @@
+"""
+Gera os arquivos estáticos com hash no nome + variantes .gz/.br + manifest (backend/assets.py).
+
+Rodar a cada deploy (depois de mexer em static/css, static/js ou static/assets):
+    python build_assets.py
+    python build_assets.py --limpar        (remove do dist o que saiu do manifest)
+
+Brotli é opcional: pip install brotli (sem ele, só .gz).
+"""
+import argparse
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, PROJECT_ROOT)
+
+from backend.assets import brotli, construir  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build dos arquivos estáticos (hash + gzip/brotli + manifest).")
+    parser.add_argument("--static", default=os.path.join(PROJECT_ROOT, "static"), help="Pasta static/ de origem")
+    parser.add_argument(
+        "--dist",
+        default=os.getenv("ASSETS_DIST", os.path.join(PROJECT_ROOT, "static", "dist")),
+        help="Pasta de saída (a mesma de ASSETS_DIST)",
+    )
+    parser.add_argument("--limpar", action="store_true", help="Remove arquivos antigos que saíram do manifest")
+    args = parser.parse_args()
+
+    manifest = construir(os.path.abspath(args.static), os.path.abspath(args.dist), limpar=args.limpar)
+
+    if brotli is None:
+        print("AVISO: pacote brotli não instalado, gerando só .gz")
+    print(f"✅ {len(manifest)} arquivos em {os.path.abspath(args.dist)}")
+
+
+if __name__ == "__main__":
+    main()
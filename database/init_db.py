@@ -1,36 +1,14 @@
 import argparse
 import sqlite3
+import sys
 from pathlib import Path
 from datetime import datetime
 import shutil
 
-SCHEMA_SQL = """
-PRAGMA foreign_keys = ON;
-
-CREATE TABLE IF NOT EXISTS "user" (
-  user TEXT PRIMARY KEY,
-  password TEXT,
-  type TEXT CHECK(type IN ('cliente', 'consultor', 'administrador')),
-  email TEXT,
-  name TEXT
-);
-
-CREATE TABLE IF NOT EXISTS solicitacoes_periodico (
-  id INTEGER PRIMARY KEY AUTOINCREMENT,
-  protocolo TEXT,
-  funcionario TEXT,
-  cpf TEXT,
-  empresa TEXT,
-  local_agendar TEXT,
-  data_preferencia TEXT,
-  telefone TEXT,
-  user TEXT,
-  status_final TEXT DEFAULT 'Em Aberto'
-);
-
-CREATE INDEX IF NOT EXISTS idx_solicitacoes_protocolo ON solicitacoes_periodico(protocolo);
-CREATE INDEX IF NOT EXISTS idx_solicitacoes_user ON solicitacoes_periodico(user);
-"""
+# permite importar backend.* rodando como script (python database/...)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.migrations import aplicar  # noqa: E402
 
 def create_or_reset_db(db_path: Path, reset: bool):
     db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -43,15 +21,15 @@ def create_or_reset_db(db_path: Path, reset: bool):
 
     conn = sqlite3.connect(db_path)
     try:
-        # Melhor para apps web (menos lock)
+        # Melhor para apps web (menos lock) — persiste no arquivo
         conn.execute("PRAGMA journal_mode = WAL;")
-        conn.execute("PRAGMA synchronous = NORMAL;")
-
-        conn.executescript(SCHEMA_SQL)
-        conn.commit()
     finally:
         conn.close()
 
+    # ✅ schema: migrações versionadas (backend/migrations, registradas em schema_migrations)
+    for versao, nome in aplicar(str(db_path)):
+        print(f"APLICADA: {versao:04d} {nome}")
+
 def seed_default_users(db_path: Path):
     """
     Cria usuários de teste (idempotente):
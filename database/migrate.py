@@ -0,0 +1,64 @@
+"""
+Leva qualquer Users.db até o schema mais novo (migrações em backend/migrations/).
+
+O que já foi aplicado fica registrado na tabela schema_migrations; rodar de novo não
+refaz nada. O portal também aplica as pendentes sozinho ao subir (AUTO_MIGRATE=1).
+
+Uso:
+    python database/migrate.py --db database/Users.db
+    python database/migrate.py --db database/Users.db --status
+    python database/migrate.py --db database/Users.db --reindexar-busca   (recarrega o FTS5)
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+# permite importar backend.* rodando como script (python database/...)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from backend import busca  # noqa: E402
+from backend.migrations import aplicar, aplicadas, migracoes  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aplica as migrações pendentes do Users.db.")
+    parser.add_argument("--db", default=os.path.join(PROJECT_ROOT, "database", "Users.db"), help="Caminho do Users.db")
+    parser.add_argument("--status", action="store_true", help="Só lista aplicadas/pendentes")
+    parser.add_argument("--reindexar-busca", action="store_true", help="Recarrega o índice de busca (FTS5) do zero")
+    args = parser.parse_args()
+
+    db_path = os.path.abspath(args.db)
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+    if args.status:
+        conn = sqlite3.connect(db_path)
+        try:
+            feitas = aplicadas(conn)
+        finally:
+            conn.close()
+        for versao, nome, _m in migracoes():
+            marca = "x" if versao in feitas else " "
+            print(f"[{marca}] {versao:04d} {nome}")
+        return
+
+    feitas = aplicar(db_path, verbose=True)
+    if not feitas:
+        print("OK: nada pendente")
+
+    if args.reindexar_busca:
+        conn = sqlite3.connect(db_path)
+        try:
+            with conn:
+                busca.criar_indice(conn, reconstruir=True)
+            total = conn.execute(f"SELECT COUNT(*) FROM {busca.TABELA}").fetchone()[0]
+        finally:
+            conn.close()
+        print(f"OK: índice de busca recarregado ({total} linhas)")
+
+    print(f"✅ Banco na última versão: {db_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Move os anexos (coluna BLOB "arquivo") para o store de anexos endereçado por SHA-256.
+
+- Garante o schema (migrações pendentes, inclusive as colunas arquivo_sha256 / arquivo_tamanho).
+- Processa em lotes pequenos: lê o BLOB em blocos (blobopen), grava no store,
+  e numa transação curta troca o BLOB por (sha256, tamanho).
+- Pode rodar com o portal no ar (WAL) e pode ser interrompido: na próxima execução
+  continua de onde parou (só pega linhas com BLOB e sem sha256).
+
+O espaço do Users.db só volta para o disco depois de um VACUUM (--vacuum, fora do horário).
+
+--limpar-orfaos: no final, apaga do store os arquivos que nenhuma solicitação usa mais
+(sobras de exclusões; ver backend/anexos.limpar_orfaos). Com --dry, só conta.
+
+Uso:
+    python database/migration_blobs_to_store.py --db database/Users.db --anexos database/Anexos
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+# permite importar backend.* rodando como script (python database/...)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from backend.anexos import TABELAS as TABLES, guardar_stream, limpar_orfaos  # noqa: E402
+from backend.migrations import aplicar, colunas  # noqa: E402
+
+
+class _BlobStream:
+    """Adapta sqlite3.Blob para o guardar_stream (só precisa de read(n))."""
+
+    def __init__(self, blob):
+        self.blob = blob
+
+    def read(self, n=-1):
+        return self.blob.read(n)
+
+
+def migrate_table(conn, table, anexos_dir, batch, pausa, dry):
+    total = 0
+    while True:
+        rows = conn.execute(
+            f"""
+            SELECT rowid, length(arquivo)
+            FROM "{table}"
+            WHERE arquivo IS NOT NULL AND arquivo_sha256 IS NULL
+            ORDER BY rowid
+            LIMIT ?
+            """,
+            (batch,),
+        ).fetchall()
+
+        if not rows:
+            break
+
+        if dry:
+            pend = conn.execute(
+                f'SELECT COUNT(*) FROM "{table}" WHERE arquivo IS NOT NULL AND arquivo_sha256 IS NULL'
+            ).fetchone()[0]
+            print(f"[DRY] {table}: {pend} anexos para mover")
+            return 0
+
+        movidos = []
+        for rowid, tamanho in rows:
+            # leitura incremental: nunca carrega o anexo inteiro na memória
+            with conn.blobopen(table, "arquivo", rowid, readonly=True) as blob:
+                sha, lidos = guardar_stream(_BlobStream(blob), base=anexos_dir)
+            if lidos != tamanho:
+                print(f"[AVISO] {table} rowid={rowid}: tamanho mudou durante a cópia, fica para a próxima")
+                continue
+            movidos.append((sha, lidos, rowid, lidos))
+
+        # transação curta: só troca BLOB -> referência (se a linha não mudou no meio)
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            f"""
+            UPDATE "{table}"
+            SET arquivo_sha256 = ?, arquivo_tamanho = ?, arquivo = NULL
+            WHERE rowid = ? AND arquivo_sha256 IS NULL AND length(arquivo) = ?
+            """,
+            movidos,
+        )
+        conn.commit()
+
+        total += len(movidos)
+        print(f"[OK] {table}: +{len(movidos)} (total {total})")
+
+        if not movidos:
+            # nada andou neste lote (linhas mudando o tempo todo): evita loop infinito
+            break
+
+        if pausa:
+            time.sleep(pausa)
+
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move anexos BLOB do Users.db para o store por SHA-256.")
+    parser.add_argument("--db", default=os.path.join(PROJECT_ROOT, "database", "Users.db"), help="Caminho do Users.db")
+    parser.add_argument("--anexos", default=os.path.join(PROJECT_ROOT, "database", "Anexos"), help="Pasta do store (ANEXOS_DIR)")
+    parser.add_argument("--batch", type=int, default=50, help="Linhas por transação")
+    parser.add_argument("--pausa", type=float, default=0.2, help="Segundos entre lotes (alivia o portal)")
+    parser.add_argument("--dry", action="store_true", help="Só mostra quanto falta")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM no final (bloqueia o banco; fora do horário)")
+    parser.add_argument("--limpar-orfaos", action="store_true", help="Apaga do store os arquivos sem solicitação")
+    parser.add_argument("--idade-min", type=int, default=3600, help="Segundos mínimos de um órfão (uploads em andamento)")
+    args = parser.parse_args()
+
+    db_path = os.path.abspath(args.db)
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"DB não encontrado: {db_path}")
+
+    anexos_dir = os.path.abspath(args.anexos)
+
+    for versao, nome in aplicar(db_path):
+        print(f"APLICADA: {versao:04d} {nome}")
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA busy_timeout = 5000")
+
+        for t in TABLES:
+            if "arquivo_sha256" not in colunas(conn, t):
+                continue
+            migrate_table(conn, t, anexos_dir, args.batch, args.pausa, args.dry)
+
+        if args.limpar_orfaos:
+            arquivos, tamanho = limpar_orfaos(conn, anexos_dir, args.idade_min, dry=args.dry)
+            prefixo = "[DRY] órfãos no store" if args.dry else "[OK] órfãos apagados do store"
+            print(f"{prefixo}: {arquivos} ({tamanho / (1024 * 1024):.1f} MB)")
+
+        if args.vacuum and not args.dry:
+            print("VACUUM...")
+            conn.execute("VACUUM")
+
+        print("✅ Migração concluída.")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
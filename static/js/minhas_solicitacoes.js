@@ -32,7 +32,7 @@ document.addEventListener("DOMContentLoaded", () => {
 
   // ===== indexa cada card uma vez (inclui texto do card inteiro, mesmo hidden) =====
   const index = new Map();
-  cards.forEach((card) => {
+  function indexCard(card) {
     const user = card.dataset.user || "";
     const cpf = card.dataset.cpf || "";
     const proto = card.dataset.proto || "";
@@ -42,7 +42,8 @@ document.addEventListener("DOMContentLoaded", () => {
       text: normText(`${user} ${cpf} ${proto} ${fullText}`),
       digits: onlyDigits(`${cpf} ${fullText}`),
     });
-  });
+  }
+  cards.forEach(indexCard);
 
   function applyFilters() {
     const termRaw = normText(q?.value);
@@ -104,5 +105,55 @@ document.addEventListener("DOMContentLoaded", () => {
     body.hidden = expanded;
   });
 
+  // ===== SSE (/api/eventos): status e resposta do consultor sem recarregar =====
+  const statusSlug = (v) => normText(v).replace(/\s+/g, "-");
+
+  function atualizarCard(card, ev) {
+    const protoBox = card.querySelector(".proto");
+    let badge = protoBox?.querySelector(".badge");
+    if (protoBox && !badge) {
+      badge = document.createElement("span");
+      protoBox.appendChild(badge);
+    }
+    if (badge && ev.status) {
+      badge.className = `badge badge-${statusSlug(ev.status)}`;
+      badge.textContent = ev.status;
+      card.dataset.status = (ev.status || "").toLowerCase();
+    }
+
+    const resposta = card.querySelector(".resposta-consultor");
+    if (resposta) resposta.textContent = ev.resposta_consultor || "-";
+
+    indexCard(card); // texto da busca muda junto (resposta nova)
+  }
+
+  const eventosUrl = list.dataset.eventosUrl || "";
+  if (window.EventSource && eventosUrl) {
+    const es = new EventSource(eventosUrl);
+
+    es.addEventListener("alteracao", (e) => {
+      let ev = null;
+      try {
+        ev = JSON.parse(e.data);
+      } catch (err) {
+        return;
+      }
+      const proto = (ev.protocolo || "").toLowerCase();
+      const card = cards.find((c) => (c.dataset.proto || "") === proto);
+      if (!card) return; // solicitação nova: aparece no próximo carregamento
+
+      if (ev.op === "D") {
+        card.remove();
+        cards.splice(cards.indexOf(card), 1);
+        index.delete(card);
+      } else {
+        atualizarCard(card, ev);
+      }
+      applyFilters();
+    });
+
+    es.addEventListener("recarregar", () => window.location.reload());
+  }
+
   applyFilters();
 });
@@ -8,7 +8,8 @@ document.addEventListener("DOMContentLoaded", () => {
   const list = document.getElementById("list");
   if (!list) return;
 
-  const cards = Array.from(list.querySelectorAll(".req-card"));
+  // cards podem entrar/sair/ser trocados pelo delta (/api/solicitacoes/alteracoes)
+  const getCards = () => Array.from(list.querySelectorAll(".req-card"));
   const emptyState =
     document.getElementById("emptyState") || list.querySelector(".empty-state");
 
@@ -94,10 +95,11 @@ document.addEventListener("DOMContentLoaded", () => {
   }
 
   // =========================
-  // Indexa cards 1x
+  // Indexa cards (1x na carga + cada card que chega pelo delta)
   // =========================
-  const index = new Map();
-  cards.forEach((card) => {
+  const index = new WeakMap();
+
+  function indexCard(card) {
     const user = card.dataset.user || "";
     const cpf = card.dataset.cpf || "";
     const proto = card.dataset.proto || "";
@@ -107,12 +109,22 @@ document.addEventListener("DOMContentLoaded", () => {
       text: normText(`${user} ${cpf} ${proto} ${fullText}`),
       digits: onlyDigits(`${cpf} ${fullText}`),
     });
-  });
+  }
+
+  getCards().forEach(indexCard);
 
   // =========================
   // Filtros
   // =========================
   function applyFilters() {
+    const cards = getCards();
+
+    // paginado: a página já veio filtrada do servidor
+    if (list.dataset.paginado === "1") {
+      setEmpty(cards.length === 0);
+      return;
+    }
+
     const termRaw = normText(q?.value);
     const termDigits = onlyDigits(q?.value);
 
@@ -146,10 +158,27 @@ document.addEventListener("DOMContentLoaded", () => {
     setEmpty(visible === 0);
   }
 
-  q?.addEventListener("input", applyFilters);
-  fTipo?.addEventListener("change", applyFilters);
-  fProto?.addEventListener("change", applyFilters);
-  fStatus?.addEventListener("change", applyFilters);
+  // Modo paginado: quem filtra é o servidor (SQL). Só reenvia o form.
+  const paginado = list.dataset.paginado === "1";
+  const formFiltros = document.getElementById("filtros");
+
+  if (paginado && formFiltros) {
+    let timer = null;
+    const submitFiltros = () => formFiltros.requestSubmit();
+
+    q?.addEventListener("input", () => {
+      clearTimeout(timer);
+      timer = setTimeout(submitFiltros, 500);
+    });
+    fTipo?.addEventListener("change", submitFiltros);
+    fProto?.addEventListener("change", submitFiltros);
+    fStatus?.addEventListener("change", submitFiltros);
+  } else {
+    q?.addEventListener("input", applyFilters);
+    fTipo?.addEventListener("change", applyFilters);
+    fProto?.addEventListener("change", applyFilters);
+    fStatus?.addEventListener("change", applyFilters);
+  }
 
   // =========================
   // Toggle detalhes
@@ -202,7 +231,7 @@ document.addEventListener("DOMContentLoaded", () => {
   // =========================
   // Mostrar/ocultar FINALIZAÇÃO no LOAD
   // =========================
-  cards.forEach((card) => toggleFinalizacao(card, card.dataset.status || ""));
+  getCards().forEach((card) => toggleFinalizacao(card, card.dataset.status || ""));
 
   // Preview ao trocar select
   list.addEventListener("change", (e) => {
@@ -330,6 +359,109 @@ document.addEventListener("DOMContentLoaded", () => {
     }
   });
 
+  // =========================
+  // Status em lote (multi-seleção -> /api/solicitacoes/status/lote)
+  // =========================
+  const bulkBar = document.getElementById("bulkBar");
+  const bulkAll = document.getElementById("bulkAll");
+  const bulkCount = document.getElementById("bulkCount");
+  const bulkStatus = document.getElementById("bulkStatus");
+  const bulkApply = document.getElementById("bulkApply");
+  const bulkMsg = document.getElementById("bulkMsg");
+
+  const selecionados = () =>
+    getCards().filter((card) => card.querySelector(".req-select")?.checked);
+
+  function atualizarBulk() {
+    const n = selecionados().length;
+    if (bulkCount) bulkCount.textContent = `${n} selecionada(s)`;
+    if (bulkApply) bulkApply.disabled = n === 0;
+  }
+
+  function setBulkMsg(type, text) {
+    if (!bulkMsg) return;
+    bulkMsg.classList.remove("is-ok", "is-err", "is-warn");
+    bulkMsg.classList.add(`is-${type}`);
+    bulkMsg.textContent = text || "";
+    bulkMsg.hidden = !text;
+  }
+
+  list.addEventListener("change", (e) => {
+    if (e.target.closest(".req-select")) atualizarBulk();
+  });
+
+  bulkAll?.addEventListener("change", () => {
+    getCards().forEach((card) => {
+      const cb = card.querySelector(".req-select");
+      // "visíveis": respeita os filtros da tela
+      if (cb && card.style.display !== "none") cb.checked = bulkAll.checked;
+    });
+    atualizarBulk();
+  });
+
+  bulkApply?.addEventListener("click", async () => {
+    const cardsSel = selecionados();
+    const novoStatus = bulkStatus?.value || "";
+    if (!cardsSel.length || !novoStatus || !bulkBar) return;
+
+    const itens = cardsSel.map((card) => {
+      const cb = card.querySelector(".req-select");
+      return {
+        origem: cb.dataset.origem || "",
+        protocolo: cb.dataset.protocolo || "",
+        status: novoStatus,
+      };
+    });
+
+    const oldText = bulkApply.textContent;
+    bulkApply.disabled = true;
+    bulkApply.textContent = "Salvando...";
+
+    try {
+      const resp = await fetch(bulkBar.dataset.url, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ itens }),
+      });
+
+      const data = await resp.json().catch(() => ({}));
+
+      if (!resp.ok || !data.ok) {
+        setBulkMsg("err", "Erro ao atualizar em lote: " + (data.error || "erro desconhecido"));
+        return;
+      }
+
+      // resultados vêm na mesma ordem dos itens enviados
+      const falhas = [];
+      (data.resultados || []).forEach((res, i) => {
+        const card = cardsSel[i];
+        if (!card) return;
+        if (res.ok) {
+          setBadge(card, res.status);
+          toggleFinalizacao(card, res.status);
+          const sel = card.querySelector(".status-select");
+          if (sel) sel.value = res.status;
+          card.querySelector(".req-select").checked = false;
+        } else {
+          falhas.push(`${res.protocolo || "?"} (${res.error})`);
+        }
+      });
+
+      if (falhas.length) {
+        setBulkMsg("warn", `${data.atualizados} atualizada(s). Não atualizadas: ${falhas.join(", ")}`);
+      } else {
+        setBulkMsg("ok", `${data.atualizados} solicitação(ões) atualizada(s) para "${novoStatus}".`);
+      }
+      if (bulkAll) bulkAll.checked = false;
+      applyFilters();
+    } catch (err) {
+      setBulkMsg("err", "Erro de conexão ao salvar em lote.");
+    } finally {
+      bulkApply.textContent = oldText;
+      atualizarBulk();
+    }
+  });
+
   // =========================
   // Salvar Avaliação / Justificativa (texto + PDF SOMENTE no Finalizado)
   // =========================
@@ -406,5 +538,182 @@ document.addEventListener("DOMContentLoaded", () => {
     }
   });
 
+  // =========================
+  // Delta: busca só o que mudou e troca só esses cards
+  // =========================
+  const POLL_MS = 15000;
+  const alteracoesUrl = list.dataset.alteracoesUrl || "";
+  let alteracoesCursor = list.dataset.alteracoesCursor || "";
+  const pendentes = new Map(); // cards ocupados: aplica quando o consultor largar
+  let novasForaDaPagina = 0;
+  let aviso = null;
+
+  const chaveCard = (origem, rid) => `${origem}:${rid}`;
+
+  function findCard(origem, rid) {
+    return list.querySelector(
+      `.req-card[data-origem="${CSS.escape(origem)}"][data-rid="${CSS.escape(String(rid))}"]`
+    );
+  }
+
+  // não troca o card em que o consultor está mexendo (foco, texto digitado, arquivo escolhido)
+  function cardOcupado(card) {
+    if (card.contains(document.activeElement)) return true;
+    if (card.querySelector(".req-select")?.checked) return true; // selecionado para o lote
+    const textarea = card.querySelector(".consultor-textarea");
+    const file = card.querySelector(".consultor-file");
+    return !!(textarea?.value.trim() || file?.files?.length);
+  }
+
+  function htmlToCard(html) {
+    const tpl = document.createElement("template");
+    tpl.innerHTML = (html || "").trim();
+    return tpl.content.querySelector(".req-card");
+  }
+
+  function trocarCard(atual, novo) {
+    // mantém aberto o que estava aberto
+    if (atual.querySelector(".toggle")?.getAttribute("aria-expanded") === "true") {
+      novo.querySelector(".toggle")?.setAttribute("aria-expanded", "true");
+      const body = novo.querySelector(".req-body");
+      if (body) body.hidden = false;
+    }
+    atual.replaceWith(novo);
+  }
+
+  function mostrarAviso(texto) {
+    if (!aviso) {
+      aviso = document.createElement("button");
+      aviso.type = "button";
+      aviso.className = "pager-link novas-aviso";
+      aviso.addEventListener("click", () => window.location.reload());
+      list.parentNode.insertBefore(aviso, list);
+    }
+    aviso.textContent = texto;
+  }
+
+  function aplicarItem(it) {
+    const novo = htmlToCard(it.html);
+    if (!novo) return;
+
+    const atual = findCard(it.origem, it.rid);
+    if (atual) {
+      if (cardOcupado(atual)) {
+        pendentes.set(chaveCard(it.origem, it.rid), it);
+        return;
+      }
+      trocarCard(atual, novo);
+    } else if (paginado) {
+      // paginado: a página veio filtrada/ordenada do servidor; só avisa
+      novasForaDaPagina++;
+      return;
+    } else {
+      list.appendChild(novo);
+    }
+
+    pendentes.delete(chaveCard(it.origem, it.rid));
+    indexCard(novo);
+    toggleFinalizacao(novo, novo.dataset.status || "");
+  }
+
+  function aplicarAlteracoes(data) {
+    (data.removidos || []).forEach((r) => {
+      pendentes.delete(chaveCard(r.origem, r.rid));
+      findCard(r.origem, r.rid)?.remove();
+    });
+
+    Array.from(pendentes.values()).forEach(aplicarItem);
+    (data.itens || []).forEach(aplicarItem);
+
+    atualizarBulk();
+
+    if (novasForaDaPagina > 0) {
+      mostrarAviso(`${novasForaDaPagina} nova(s) solicitação(ões) — clique para atualizar`);
+    }
+    applyFilters();
+  }
+
+  // poll + SSE podem pedir ao mesmo tempo: um fetch por vez (o cursor é sequencial)
+  let buscando = false;
+  let buscarDeNovo = false;
+
+  async function buscarAlteracoes() {
+    if (!alteracoesUrl || !alteracoesCursor) return;
+    if (buscando) {
+      buscarDeNovo = true;
+      return;
+    }
+    buscando = true;
+
+    try {
+      const url = `${alteracoesUrl}?desde=${encodeURIComponent(alteracoesCursor)}`;
+      const resp = await fetch(url, { headers: { Accept: "application/json" } });
+      const data = await resp.json().catch(() => ({}));
+      if (!resp.ok || !data.ok) return;
+
+      if (data.recarregar) {
+        // muita coisa mudou desde o último cursor: recarrega se ninguém estiver editando
+        if (getCards().some(cardOcupado)) {
+          mostrarAviso("A lista mudou bastante — clique para atualizar");
+        } else {
+          window.location.reload();
+        }
+        return;
+      }
+
+      alteracoesCursor = data.cursor || alteracoesCursor;
+      aplicarAlteracoes(data);
+    } catch (err) {
+      // sem conexão: tenta de novo no próximo ciclo
+    } finally {
+      buscando = false;
+      if (buscarDeNovo) {
+        buscarDeNovo = false;
+        buscarAlteracoes();
+      }
+    }
+  }
+
+  // =========================
+  // SSE (/api/eventos): avisa na hora que algo mudou; o delta acima traz os cards
+  // =========================
+  const POLL_SSE_MS = 60000; // com SSE aberto o poll vira só rede de segurança
+  const eventosUrl = list.dataset.eventosUrl || "";
+  let sseAberto = false;
+
+  if (window.EventSource && eventosUrl && alteracoesUrl) {
+    const es = new EventSource(eventosUrl);
+    let sseTimer = null;
+    // várias alterações em sequência = 1 busca só
+    const puxar = () => {
+      clearTimeout(sseTimer);
+      sseTimer = setTimeout(buscarAlteracoes, 300);
+    };
+
+    es.addEventListener("open", () => {
+      sseAberto = true;
+    });
+    es.addEventListener("error", () => {
+      sseAberto = false; // o EventSource reconecta sozinho
+    });
+    es.addEventListener("alteracao", puxar);
+    es.addEventListener("recarregar", puxar);
+  }
+
+  let pollTimer = null;
+  function agendarPoll(ms) {
+    clearTimeout(pollTimer);
+    pollTimer = setTimeout(async () => {
+      if (!document.hidden) await buscarAlteracoes();
+      agendarPoll(sseAberto ? POLL_SSE_MS : POLL_MS);
+    }, ms);
+  }
+
+  document.addEventListener("visibilitychange", () => {
+    if (!document.hidden) agendarPoll(0);
+  });
+
+  if (alteracoesUrl && alteracoesCursor) agendarPoll(POLL_MS);
+
   applyFilters();
 });